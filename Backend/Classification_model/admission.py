@@ -0,0 +1,134 @@
+"""
+Priority admission control for the prediction path.
+At most `max_concurrent` predictions run against the backend at once. Extra
+requests wait in a priority queue, with interactive (a user waiting on the
+upload page) ahead of bulk/background work. A request that cannot start
+within its priority's queue-time budget is shed: it is answered by a
+fallback (e.g. the local backend) or rejected with LoadShedError, instead of
+piling more load onto an already slow endpoint.
+"""
+
+from collections import deque
+import heapq
+import itertools
+import threading
+import time
+
+from Backend.Classification_model.batcher import percentile
+
+# Lower value = served first
+PRIORITIES = {"interactive": 0, "bulk": 1}
+
+
+class LoadShedError(Exception):
+    """Request shed because it could not be admitted within its queue-time budget."""
+
+    code = 429
+
+
+class AdmissionController:
+    """
+    Bounded-concurrency gate with priorities and queue-time budgets.
+
+    Args:
+        max_concurrent (int): Predictions allowed to run at once
+        budgets (dict): Max seconds a request of each priority may wait in the queue
+    """
+
+    def __init__(self, max_concurrent=8, budgets=None):
+        self.max_concurrent = max_concurrent
+        self.budgets = {"interactive": 2.0, "bulk": 30.0, **(budgets or {})}
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._waits = deque(maxlen=1000)
+        self._counters = {
+            priority: {"served": 0, "queued": 0, "shed": 0, "fallback": 0} for priority in PRIORITIES
+        }
+
+    def _acquire(self, priority, budget):
+        """Wait for a slot; True once admitted, False when the budget ran out."""
+        start = time.monotonic()
+        with self._cond:
+            if self._in_flight < self.max_concurrent and not self._waiting:
+                self._in_flight += 1
+                return True
+
+            ticket = (PRIORITIES[priority], next(self._sequence))
+            heapq.heappush(self._waiting, ticket)
+            self._counters[priority]["queued"] += 1
+            expires_at = start + budget
+            while True:
+                if self._waiting[0] == ticket and self._in_flight < self.max_concurrent:
+                    heapq.heappop(self._waiting)
+                    self._in_flight += 1
+                    self._waits.append(time.monotonic() - start)
+                    # The next waiter may fit into another free slot
+                    self._cond.notify_all()
+                    return True
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    self._waiting.remove(ticket)
+                    heapq.heapify(self._waiting)
+                    self._cond.notify_all()
+                    return False
+                self._cond.wait(remaining)
+
+    def _release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def run(self, fn, priority="interactive", fallback=None, budget=None):
+        """
+        Run `fn` once admitted, or shed it.
+
+        Args:
+            fn (callable): The prediction call
+            priority (str): "interactive" or "bulk"
+            fallback (callable): Answers a shed request (e.g. the local backend);
+                without one, shed requests raise LoadShedError
+            budget (float): Override the priority's queue-time budget in seconds
+
+        Returns:
+            The result of `fn`, or of `fallback` when shed
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        budget = self.budgets[priority] if budget is None else budget
+
+        if self._acquire(priority, budget):
+            try:
+                return fn()
+            finally:
+                self._release()
+                with self._cond:
+                    self._counters[priority]["served"] += 1
+
+        with self._cond:
+            self._counters[priority]["shed"] += 1
+            if fallback is not None:
+                self._counters[priority]["fallback"] += 1
+        if fallback is None:
+            raise LoadShedError(f"{priority} request not admitted within {budget:.1f}s")
+        print(f"🚦 Shedding {priority} request to the fallback after {budget:.1f}s in the queue.")
+        return fallback()
+
+    def stats(self):
+        """
+        Admission counters.
+
+        Returns:
+            dict: in-flight and waiting requests now, queue wait percentiles (ms)
+            and per-priority served/queued/shed/fallback totals
+        """
+        with self._cond:
+            waits = list(self._waits)
+            return {
+                "in_flight": self._in_flight,
+                "waiting": len(self._waiting),
+                "wait_ms_p50": percentile(waits, 50) * 1000,
+                "wait_ms_p95": percentile(waits, 95) * 1000,
+                **{priority: dict(counters) for priority, counters in self._counters.items()},
+            }
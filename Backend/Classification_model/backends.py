@@ -0,0 +1,250 @@
+"""
+Pluggable prediction backends.
+Every backend takes a list of image bytes and returns one prediction per
+image in the Vertex AI AutoML shape the upload page already understands:
+{"ids": [...], "displayNames": [...], "confidences": [...]}, sorted by
+confidence. Backends also record their own latency.
+
+- VertexBackend: the deployed Vertex AI endpoint (default)
+- LocalBackend: an exported Food-101 model run on CPU, either an ONNX file
+  (needs the optional onnxruntime package) or an .npz of MLP weights run
+  with a pure-NumPy forward pass
+
+Getting a model for LocalBackend (LOCAL_MODEL_PATH): the ONNX model takes a
+float32 N x 3 x H x W batch (center-cropped RGB in 0-1, normalized with the
+ImageNet mean/std) and returns 101 logits in the class order of
+Datasets/Nutrient_Database.csv (Food-101 index order). A torchvision
+classifier fine-tuned on Food-101 matches this as is:
+    torch.onnx.export(model.eval(), torch.randn(1, 3, 224, 224), "food101.onnx",
+                      input_names=["input"], dynamic_axes={"input": {0: "batch"}})
+The Vertex AI AutoML model can only be exported if it was trained as an edge
+model (`gcloud ai models export MODEL_ID --export-format-id=tflite ...`).
+Those exports take uint8 N x H x W x 3 input, so convert them with tf2onnx
+and adapt the input layout before use. Compare a local model against the
+endpoint with `python -m Backend.Classification_model.evaluate eval/ --backend local`.
+"""
+
+from collections import deque
+from PIL import Image
+import numpy as np
+import base64
+import io
+import threading
+import time
+
+from Backend.Classification_model.batcher import percentile
+
+# ImageNet normalization used by standard Food-101 exports
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def encode_instance(image_bytes):
+    """Wrap raw image bytes in the instance format expected by Vertex AI."""
+    return {"content": base64.b64encode(image_bytes).decode("utf-8")}
+
+
+def to_prediction(probabilities, labels, top_k=None):
+    """Convert a probability vector into a Vertex-style prediction dict of the top_k classes."""
+    if top_k and top_k < len(probabilities):
+        candidates = np.argpartition(probabilities, -top_k)[-top_k:]
+        order = candidates[np.argsort(probabilities[candidates])[::-1]]
+    else:
+        order = np.argsort(probabilities)[::-1]
+    return {
+        "ids": [str(int(i)) for i in order],
+        "displayNames": [labels[i] for i in order],
+        "confidences": [float(probabilities[i]) for i in order],
+    }
+
+
+def top_k_prediction(prediction, top_k):
+    """
+    Keep only the top_k most confident classes of a Vertex-style prediction,
+    sorted by confidence (endpoints may ignore maxPredictions or return all classes).
+    """
+    if not top_k:
+        return prediction
+    labels = prediction.get("displayNames", [])
+    scores = prediction.get("confidences", [])
+    ids = prediction.get("ids") or [None] * len(labels)
+    ranked = sorted(zip(scores, labels, ids), key=lambda item: item[0], reverse=True)[:top_k]
+    compact = {
+        "displayNames": [label for _, label, _ in ranked],
+        "confidences": [score for score, _, _ in ranked],
+    }
+    if prediction.get("ids"):
+        compact["ids"] = [i for _, _, i in ranked]
+    return compact
+
+
+def softmax(logits):
+    """Row-wise softmax of a 2-D logits array."""
+    shifted = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class PredictorBackend:
+    """Base class: subclasses implement _predict(images) and set cache_namespace."""
+
+    name = "base"
+
+    def __init__(self):
+        self._latencies = deque(maxlen=10000)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.images = 0
+
+    @property
+    def cache_namespace(self):
+        """Identity of the model behind this backend, used to key cached results."""
+        raise NotImplementedError
+
+    def _predict(self, images):
+        raise NotImplementedError
+
+    def predict(self, images):
+        """
+        Classify a batch of images.
+
+        Args:
+            images (list): Image bytes (or bytes-like buffers)
+
+        Returns:
+            list[dict]: One Vertex-style prediction per image, in input order
+        """
+        start = time.perf_counter()
+        predictions = self._predict(images)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.calls += 1
+            self.images += len(images)
+            self._latencies.append(elapsed)
+        return predictions
+
+    def latency_stats(self):
+        """Per-call latency percentiles for this backend."""
+        with self._lock:
+            latencies = list(self._latencies)
+            return {
+                "backend": self.name,
+                "calls": self.calls,
+                "images": self.images,
+                "latency_ms_p50": percentile(latencies, 50) * 1000,
+                "latency_ms_p95": percentile(latencies, 95) * 1000,
+                "latency_ms_p99": percentile(latencies, 99) * 1000,
+            }
+
+
+class VertexBackend(PredictorBackend):
+    """
+    Sends images to the Vertex AI endpoint.
+
+    Args:
+        send_fn (callable): Takes a list of instances and returns the predictions
+        endpoint_name_fn (callable): Returns the endpoint resource name
+        top_k (int): Classes kept per prediction (None keeps all)
+    """
+
+    name = "vertex"
+
+    def __init__(self, send_fn, endpoint_name_fn, top_k=None):
+        super().__init__()
+        self.send_fn = send_fn
+        self.endpoint_name_fn = endpoint_name_fn
+        self.top_k = top_k
+
+    @property
+    def cache_namespace(self):
+        return self.endpoint_name_fn()
+
+    def _predict(self, images):
+        predictions = self.send_fn([encode_instance(image) for image in images])
+        return [top_k_prediction(prediction, self.top_k) for prediction in predictions]
+
+
+class LocalBackend(PredictorBackend):
+    """
+    Runs an exported Food-101 classifier on the CPU.
+
+    Args:
+        model_path (str): .onnx model or .npz file of MLP weights
+            (keys W0, b0, W1, b1, ...; optional input_size, mean, std, labels)
+        labels (list): Class names in model output order (default: Food-101
+            classes from the nutrient database, which are in Food-101 index order)
+        top_k (int): Classes kept per prediction (None keeps all)
+    """
+
+    name = "local"
+
+    def __init__(self, model_path, labels=None, top_k=None):
+        super().__init__()
+        self.model_path = model_path
+        self.top_k = top_k
+        self.mean, self.std = IMAGENET_MEAN, IMAGENET_STD
+
+        if model_path.endswith(".onnx"):
+            try:
+                import onnxruntime
+            except ImportError as e:
+                raise RuntimeError("The ONNX local backend needs `pip install onnxruntime`.") from e
+            self._session = onnxruntime.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+            model_input = self._session.get_inputs()[0]
+            self._input_name = model_input.name
+            height = model_input.shape[2]
+            self.input_size = height if isinstance(height, int) else 224
+            self._forward = self._forward_onnx
+        else:
+            weights = np.load(model_path, allow_pickle=False)
+            self._layers = []
+            while f"W{len(self._layers)}" in weights:
+                i = len(self._layers)
+                self._layers.append((weights[f"W{i}"].astype(np.float32), weights[f"b{i}"].astype(np.float32)))
+            self.input_size = int(weights["input_size"]) if "input_size" in weights else 64
+            if "mean" in weights:
+                self.mean = weights["mean"].astype(np.float32)
+            if "std" in weights:
+                self.std = weights["std"].astype(np.float32)
+            if labels is None and "labels" in weights:
+                labels = [str(label) for label in weights["labels"]]
+            self._forward = self._forward_numpy
+
+        if not labels:
+            # The nutrient helpers pull in pandas; only load them when labels are needed
+            from Backend.Classification_model.nutrition import load_food_labels
+
+            labels = load_food_labels()
+        self.labels = labels
+
+    @property
+    def cache_namespace(self):
+        return f"local:{self.model_path}"
+
+    def _to_array(self, image_bytes):
+        """Decode, center-crop and normalize one image to a CHW float32 array."""
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            image = image.convert("RGB")
+            side = min(image.size)
+            left, top = (image.width - side) // 2, (image.height - side) // 2
+            image = image.crop((left, top, left + side, top + side))
+            image = image.resize((self.input_size, self.input_size), Image.BILINEAR)
+            pixels = np.asarray(image, dtype=np.float32) / 255.0
+        return ((pixels - self.mean) / self.std).transpose(2, 0, 1)
+
+    def _forward_onnx(self, batch):
+        logits = self._session.run(None, {self._input_name: batch})[0]
+        return softmax(logits)
+
+    def _forward_numpy(self, batch):
+        activations = batch.reshape(len(batch), -1)
+        for i, (weight, bias) in enumerate(self._layers):
+            activations = activations @ weight + bias
+            if i < len(self._layers) - 1:
+                activations = np.maximum(activations, 0)
+        return softmax(activations)
+
+    def _predict(self, images):
+        batch = np.stack([self._to_array(image) for image in images])
+        probabilities = self._forward(batch)
+        return [to_prediction(row, self.labels, self.top_k) for row in probabilities]
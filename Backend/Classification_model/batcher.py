@@ -0,0 +1,141 @@
+"""
+Cross-session micro-batcher for Vertex AI predictions.
+Requests from every Streamlit session are queued, gathered for a few
+milliseconds (or until a batch is full, by count or by request bytes) and
+sent as one endpoint.predict call; each caller then receives its own
+prediction.
+"""
+
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import json
+import math
+import queue
+import threading
+import time
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class MicroBatcher:
+    """
+    Background batching service in front of a batch prediction function.
+
+    Args:
+        predict_fn (callable): Takes a list of instances, returns a list of predictions in order
+        max_batch_size (int): Max instances per batch
+        max_wait_ms (float): Max time the first request of a batch waits for company
+        max_concurrent_batches (int): Batches allowed in flight at once
+        max_payload_bytes (int): Max request size; a batch is flushed early rather
+            than grow past it (None for no limit)
+        size_fn (callable): Approximate serialized size of one instance in bytes
+    """
+
+    def __init__(self, predict_fn, max_batch_size=16, max_wait_ms=5.0, max_concurrent_batches=4,
+                 max_payload_bytes=None, size_fn=None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_payload_bytes = max_payload_bytes
+        self.size_fn = size_fn or (lambda instance: len(json.dumps(instance)))
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_batches, thread_name_prefix="batch")
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        self.requests = 0
+        self.batches = 0
+        self.batch_sizes = Counter()
+        self._queue_waits = deque(maxlen=10000)
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._collect_loop, name="micro-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, instance):
+        """
+        Queue one instance for the next batch.
+
+        Returns:
+            concurrent.futures.Future: resolves to this instance's prediction
+        """
+        self._ensure_started()
+        future = Future()
+        self._queue.put((instance, future, time.perf_counter()))
+        return future
+
+    def predict(self, instance, timeout=None):
+        """Submit an instance and block until its prediction is ready."""
+        return self.submit(instance).result(timeout=timeout)
+
+    def _collect_loop(self):
+        # An item that would have pushed the previous batch over the byte budget
+        carried = None
+        while True:
+            batch = [carried or self._queue.get()]
+            carried = None
+            payload = self._payload_size(batch[0])
+            flush_at = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = flush_at - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                size = self._payload_size(item)
+                if self.max_payload_bytes and payload + size > self.max_payload_bytes:
+                    # Starts the next batch; a single oversized item still goes alone
+                    carried = item
+                    break
+                batch.append(item)
+                payload += size
+            self._executor.submit(self._dispatch, batch)
+
+    def _payload_size(self, item):
+        return self.size_fn(item[0]) if self.max_payload_bytes else 0
+
+    def _dispatch(self, batch):
+        dispatched_at = time.perf_counter()
+        with self._stats_lock:
+            self.requests += len(batch)
+            self.batches += 1
+            self.batch_sizes[len(batch)] += 1
+            self._queue_waits.extend(dispatched_at - enqueued_at for _, _, enqueued_at in batch)
+
+        try:
+            predictions = self.predict_fn([instance for instance, _, _ in batch])
+            if len(predictions) != len(batch):
+                raise ValueError(f"expected {len(batch)} predictions, got {len(predictions)}")
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future, _), prediction in zip(batch, predictions):
+            future.set_result(prediction)
+
+    def stats(self):
+        """Request/batch counts, batch-size histogram and added queueing latency."""
+        with self._stats_lock:
+            waits = list(self._queue_waits)
+            return {
+                "requests": self.requests,
+                "batches": self.batches,
+                "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+                "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+                "queue_wait_ms_p50": percentile(waits, 50) * 1000,
+                "queue_wait_ms_p95": percentile(waits, 95) * 1000,
+                "queue_wait_ms_p99": percentile(waits, 99) * 1000,
+            }
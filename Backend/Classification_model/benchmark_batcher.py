@@ -0,0 +1,86 @@
+"""
+Micro-batching benchmark against the local fake endpoint.
+Simulates concurrent sessions sending single-image predictions, once with a
+request per image and once through MicroBatcher, and reports throughput,
+end-to-end latency, endpoint calls and the batch-size histogram.
+
+Run from the project root:
+    python -m Backend.Classification_model.benchmark_batcher --sessions 50 --requests 10
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import base64
+import os
+import time
+
+from Backend.Classification_model.batcher import MicroBatcher, percentile
+from Backend.Classification_model.fake_endpoint import FakeEndpoint
+
+
+def _run_sessions(predict_one, sessions, requests_per_session):
+    """Drive `sessions` threads, each issuing requests back to back; returns latencies and wall time."""
+    def _session(session_id):
+        latencies = []
+        for i in range(requests_per_session):
+            instance = {"content": base64.b64encode(os.urandom(2048)).decode("utf-8")}
+            start = time.perf_counter()
+            predict_one(instance)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        results = list(pool.map(_session, range(sessions)))
+    wall = time.perf_counter() - start
+    return [latency for session in results for latency in session], wall
+
+
+def _report(name, latencies, wall, endpoint):
+    print(f"\n{name}")
+    print(f"  throughput:     {len(latencies) / wall:.1f} predictions/s")
+    print(f"  latency p50/95/99: {percentile(latencies, 50) * 1000:.0f} / "
+          f"{percentile(latencies, 95) * 1000:.0f} / {percentile(latencies, 99) * 1000:.0f} ms")
+    print(f"  endpoint calls: {endpoint.calls}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cross-session micro-batching.")
+    parser.add_argument("--sessions", type=int, default=50, help="Concurrent sessions")
+    parser.add_argument("--requests", type=int, default=10, help="Requests per session")
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--base-latency", type=float, default=0.15, help="Fake endpoint seconds per call")
+    parser.add_argument("--concurrency-limit", type=int, default=8,
+                        help="Max concurrent endpoint calls (simulates connection/quota limits)")
+    args = parser.parse_args()
+
+    # Unbatched: every session calls the endpoint itself, bounded by the same connection limit
+    endpoint = FakeEndpoint(base_latency=args.base_latency, seed=1)
+    with ThreadPoolExecutor(max_workers=args.concurrency_limit) as connections:
+        latencies, wall = _run_sessions(
+            lambda instance: connections.submit(endpoint.predict, [instance]).result(),
+            args.sessions, args.requests,
+        )
+    _report("One request per image", latencies, wall, endpoint)
+
+    # Batched: sessions share a MicroBatcher in front of the endpoint
+    endpoint = FakeEndpoint(base_latency=args.base_latency, seed=1)
+    batcher = MicroBatcher(
+        lambda instances: endpoint.predict(instances).predictions,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        max_concurrent_batches=args.concurrency_limit,
+    )
+    latencies, wall = _run_sessions(batcher.predict, args.sessions, args.requests)
+    _report("Micro-batched", latencies, wall, endpoint)
+
+    stats = batcher.stats()
+    print(f"  mean batch size: {stats['mean_batch_size']:.1f}")
+    print(f"  added queue wait p50/95/99: {stats['queue_wait_ms_p50']:.1f} / "
+          f"{stats['queue_wait_ms_p95']:.1f} / {stats['queue_wait_ms_p99']:.1f} ms")
+    print(f"  batch sizes: {stats['batch_size_histogram']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+First-call vs steady-state latency over a persistent gRPC channel.
+Measures a cold first request (connection set up on demand), a first request
+after warm_up(), steady-state requests on the open channel, and a request
+after an idle gap, plus how many requests reused a ready connection.
+
+By default this runs against a local fake PredictionService; pass --vertex
+to use the endpoint configured in .env (needs credentials).
+
+Run from the project root:
+    python -m Backend.Classification_model.benchmark_grpc --requests 30 --idle 5
+"""
+
+import argparse
+import base64
+import time
+
+from Backend.Classification_model.batcher import percentile
+from Backend.Classification_model.grpc_endpoint import GrpcEndpoint
+from Backend.Classification_model.preprocessing import preprocess_image
+
+DEFAULT_IMAGE = "Backend/Classification_model/pizzaa.jpg"
+
+
+def _timed_predict(endpoint, instances):
+    start = time.perf_counter()
+    endpoint.predict(instances=instances, timeout=30)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the persistent gRPC prediction channel.")
+    parser.add_argument("--requests", type=int, default=30, help="Steady-state requests")
+    parser.add_argument("--idle", type=float, default=5.0, help="Idle seconds before the last request")
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    parser.add_argument("--vertex", action="store_true", help="Use the configured Vertex AI endpoint")
+    args = parser.parse_args()
+
+    if args.vertex:
+        from Backend.Classification_model import predictor
+
+        settings = predictor.get_vertex_settings()
+        region, _ = settings["endpoints"][0]
+        credentials = predictor._load_credentials()
+
+        def make_endpoint():
+            return GrpcEndpoint(
+                predictor.get_endpoint_names()[0],
+                f"{region}-aiplatform.googleapis.com",
+                credentials=credentials,
+                keepalive_seconds=predictor.GRPC_KEEPALIVE_SECONDS,
+            )
+    else:
+        from Backend.Classification_model.fake_endpoint import FakeEndpoint, start_grpc_server
+
+        _, target = start_grpc_server(FakeEndpoint(base_latency=0.05, jitter=0.01))
+
+        def make_endpoint():
+            return GrpcEndpoint("projects/local/locations/local/endpoints/fake", target, insecure=True)
+
+    with open(args.image, "rb") as f:
+        image, _ = preprocess_image(f.read())
+    instances = [{"content": base64.b64encode(image).decode("utf-8")}]
+
+    cold = make_endpoint()
+    cold_first = _timed_predict(cold, instances)
+    cold.close()
+
+    endpoint = make_endpoint()
+    warm_up = endpoint.warm_up()
+    warm_first = _timed_predict(endpoint, instances)
+    steady = [_timed_predict(endpoint, instances) for _ in range(args.requests)]
+    time.sleep(args.idle)
+    after_idle = _timed_predict(endpoint, instances)
+    stats = endpoint.stats()
+    endpoint.close()
+
+    print(f"Cold first call:          {cold_first * 1000:7.1f} ms (connection opened on demand)")
+    print(f"Warm-up ping:             {warm_up * 1000:7.1f} ms (off the request path)")
+    print(f"First call after warm-up: {warm_first * 1000:7.1f} ms")
+    print(f"Steady state p50 / p95:   {percentile(steady, 50) * 1000:7.1f} / {percentile(steady, 95) * 1000:.1f} ms")
+    print(f"After {args.idle:.0f}s idle:           {after_idle * 1000:7.1f} ms")
+    print(f"Connection reuse:         {stats['reused_connection']}/{stats['requests']} requests, "
+          f"{stats['connects']} connection(s) opened")
+
+
+if __name__ == "__main__":
+    main()
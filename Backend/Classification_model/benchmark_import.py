@@ -0,0 +1,66 @@
+"""
+Import-time benchmark for the prediction client.
+Compares the cost of importing predictor.py (lazy) against importing it and
+building the Vertex AI endpoint straight away (what the old module did).
+
+Run from the project root:
+    python -m Backend.Classification_model.benchmark_import --runs 5
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+# Each snippet runs in a fresh interpreter so module caches do not skew timings
+LAZY_SNIPPET = """
+import time
+start = time.perf_counter()
+import Backend.Classification_model.predictor
+print(time.perf_counter() - start)
+"""
+
+EAGER_SNIPPET = """
+import time
+start = time.perf_counter()
+import Backend.Classification_model.predictor as predictor
+predictor.get_endpoint()
+print(time.perf_counter() - start)
+"""
+
+
+def _time_snippet(snippet, runs):
+    """Run a snippet in `runs` fresh interpreters and return the timings in seconds."""
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", snippet], capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip())
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark predictor import time.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per mode")
+    parser.add_argument(
+        "--skip-eager", action="store_true",
+        help="Only time the lazy import (no Vertex AI credentials needed)"
+    )
+    args = parser.parse_args()
+
+    lazy = _time_snippet(LAZY_SNIPPET, args.runs)
+    print(f"Lazy import:   median {statistics.median(lazy) * 1000:.1f} ms over {args.runs} runs")
+
+    if args.skip_eager:
+        return
+
+    eager = _time_snippet(EAGER_SNIPPET, args.runs)
+    print(f"Eager setup:   median {statistics.median(eager) * 1000:.1f} ms over {args.runs} runs")
+    print(f"Startup saved: {(statistics.median(eager) - statistics.median(lazy)) * 1000:.1f} ms per process")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+End-to-end prediction latency benchmark.
+Drives predict_image_bytes through the HTTP fake endpoint (started in-process
+unless --url is given) at several concurrency levels and reports p50/p95/p99
+latency, throughput, errors and bytes sent.
+
+Run from the project root:
+    python -m Backend.Classification_model.benchmark_latency --concurrency 1,8,32 --requests 20
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+import argparse
+import io
+import os
+import struct
+import time
+import zlib
+
+from Backend.Classification_model.batcher import percentile
+from Backend.Classification_model.fake_endpoint import FakeEndpoint, start_server
+
+DEFAULT_IMAGE = "Backend/Classification_model/pizzaa.jpg"
+
+
+def _load_images(path):
+    """Image bytes from a file or every jpg/png in a folder."""
+    if os.path.isdir(path):
+        names = sorted(n for n in os.listdir(path) if n.lower().endswith((".jpg", ".jpeg", ".png")))
+        paths = [os.path.join(path, n) for n in names]
+    else:
+        paths = [path]
+    images = []
+    for image_path in paths:
+        with open(image_path, "rb") as f:
+            images.append(f.read())
+    return images
+
+
+def unique_variant(image_bytes, tag):
+    """
+    The same image with a unique metadata comment, so every request misses
+    the cache and single-flight layers while still passing validation.
+    JPEG gets a COM segment after SOI, PNG a tEXt chunk after IHDR.
+    """
+    image_bytes = bytes(image_bytes)
+    text = f"benchmark {tag}".encode("ascii")
+    if image_bytes.startswith(b"\x89PNG"):
+        # 8-byte signature + IHDR chunk (4 length + 4 type + 13 data + 4 CRC)
+        body = b"tEXt" + b"Comment\x00" + text
+        chunk = struct.pack(">I", len(body) - 4) + body + struct.pack(">I", zlib.crc32(body))
+        return image_bytes[:33] + chunk + image_bytes[33:]
+    segment = b"\xff\xfe" + struct.pack(">H", len(text) + 2) + text
+    return image_bytes[:2] + segment + image_bytes[2:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the prediction path against a fake endpoint.")
+    parser.add_argument("--url", help="Existing endpoint URL (default: start a local fake endpoint)")
+    parser.add_argument("--images", default=DEFAULT_IMAGE, help="Image file or folder")
+    parser.add_argument("--concurrency", default="1,4,16,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per worker at each level")
+    parser.add_argument("--latency-ms", type=float, default=150, help="Fake endpoint median latency")
+    parser.add_argument("--spread", type=float, default=0.3, help="Fake endpoint lognormal sigma")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fake endpoint error rate")
+    parser.add_argument("--no-preprocess", action="store_true", help="Send raw image bytes")
+    args = parser.parse_args()
+
+    url = args.url
+    if not url:
+        fake = FakeEndpoint(
+            base_latency=args.latency_ms / 1000, jitter=args.spread,
+            error_rate=args.error_rate, distribution="lognormal", seed=1,
+        )
+        _, url = start_server(fake)
+
+    # The predictor reads its configuration at import time
+    os.environ["VERTEX_ENDPOINT_URL"] = url
+    from Backend.Classification_model import predictor
+
+    images = _load_images(args.images)
+    endpoint = predictor.get_endpoint()
+    preprocess = not args.no_preprocess
+
+    print(f"Endpoint: {url}")
+    print(f"{'conc':>5} {'reqs':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8} {'errors':>7} {'KB/req':>8}")
+
+    for concurrency in [int(level) for level in args.concurrency.split(",")]:
+        before = endpoint.stats()
+        total = concurrency * args.requests
+
+        def _one(i):
+            # A unique comment defeats the cache and single-flight layers
+            image = unique_variant(images[i % len(images)], f"{concurrency}-{i}")
+            start = time.perf_counter()
+            result = predictor.predict_image_bytes(image, use_cache=False, preprocess=preprocess)
+            return time.perf_counter() - start, result is not None
+
+        # Silence the predictor's per-request logging while measuring
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(_one, range(total)))
+        wall = time.perf_counter() - start
+
+        after = endpoint.stats()
+        latencies = [latency for latency, ok in results if ok]
+        errors = sum(1 for _, ok in results if not ok)
+        sent = after["bytes_sent"] - before["bytes_sent"]
+        sent_requests = max(after["requests"] - before["requests"], 1)
+
+        print(
+            f"{concurrency:>5} {total:>6} "
+            f"{percentile(latencies, 50) * 1000:>8.0f} {percentile(latencies, 95) * 1000:>8.0f} "
+            f"{percentile(latencies, 99) * 1000:>8.0f} {total / wall:>8.1f} {errors:>7} "
+            f"{sent / sent_requests / 1024:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
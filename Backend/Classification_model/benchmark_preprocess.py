@@ -0,0 +1,86 @@
+"""
+Preprocessing benchmark on a reference image set.
+Sends every image in a folder twice (raw and preprocessed) and reports upload
+bytes, prediction latency and top-1 agreement between the two.
+
+Run from the project root:
+    python -m Backend.Classification_model.benchmark_preprocess path/to/images --quality 90
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from Backend.Classification_model import preprocessing
+from Backend.Classification_model.predictor import predict_image_classification
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def _top1(predictions):
+    """Top-1 label from a prediction list, or None."""
+    if not predictions:
+        return None
+    labels = predictions[0].get("displayNames", [])
+    scores = predictions[0].get("confidences", [])
+    if not labels or not scores:
+        return None
+    return labels[scores.index(max(scores))]
+
+
+def _timed_predict(path, preprocess):
+    start = time.perf_counter()
+    predictions = predict_image_classification(path, use_cache=False, preprocess=preprocess)
+    return predictions, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark image preprocessing.")
+    parser.add_argument("folder", help="Folder of reference images")
+    parser.add_argument("--max-side", type=int, default=preprocessing.MODEL_INPUT_SIZE)
+    parser.add_argument("--quality", type=int, default=preprocessing.JPEG_QUALITY)
+    args = parser.parse_args()
+
+    preprocessing.MODEL_INPUT_SIZE = args.max_side
+    preprocessing.JPEG_QUALITY = args.quality
+
+    paths = sorted(
+        os.path.join(args.folder, name)
+        for name in os.listdir(args.folder)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+    bytes_raw, bytes_processed = 0, 0
+    latency_raw, latency_processed = [], []
+    agreements = 0
+
+    for path in paths:
+        with open(path, "rb") as f:
+            raw = f.read()
+        processed, _ = preprocessing.preprocess_image(raw)
+        bytes_raw += len(raw)
+        bytes_processed += len(processed)
+
+        raw_predictions, raw_seconds = _timed_predict(path, preprocess=False)
+        processed_predictions, processed_seconds = _timed_predict(path, preprocess=True)
+        latency_raw.append(raw_seconds)
+        latency_processed.append(processed_seconds)
+
+        top_raw, top_processed = _top1(raw_predictions), _top1(processed_predictions)
+        agreements += int(top_raw is not None and top_raw == top_processed)
+
+    if not paths:
+        print("⚠️ No images found.")
+        return
+
+    print(f"Images:          {len(paths)} (max side {args.max_side}px, quality {args.quality})")
+    print(f"Upload bytes:    {bytes_raw / 1024:.0f} KB → {bytes_processed / 1024:.0f} KB "
+          f"({bytes_raw / max(bytes_processed, 1):.1f}x smaller)")
+    print(f"Median latency:  {statistics.median(latency_raw) * 1000:.0f} ms → "
+          f"{statistics.median(latency_processed) * 1000:.0f} ms")
+    print(f"Top-1 agreement: {agreements}/{len(paths)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Multi-endpoint routing benchmark.
+Starts three local fake endpoints with different latency profiles, routes
+predictions across them, then degrades the fastest one and recovers it,
+reporting traffic share and latency for each phase.
+
+Run from the project root:
+    python -m Backend.Classification_model.benchmark_router --requests 60
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+import argparse
+import io
+import os
+import time
+
+from Backend.Classification_model.batcher import percentile
+from Backend.Classification_model.benchmark_latency import unique_variant
+from Backend.Classification_model.fake_endpoint import FakeEndpoint, start_server
+
+DEFAULT_IMAGE = "Backend/Classification_model/pizzaa.jpg"
+
+# name -> median latency in seconds
+PROFILES = {"fast": 0.05, "medium": 0.15, "slow": 0.40}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark latency-aware endpoint routing.")
+    parser.add_argument("--requests", type=int, default=60, help="Requests per phase")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--image", default=DEFAULT_IMAGE)
+    args = parser.parse_args()
+
+    fakes, urls = {}, []
+    for name, latency in PROFILES.items():
+        fakes[name] = FakeEndpoint(base_latency=latency, jitter=0.2, distribution="lognormal", seed=len(urls))
+        _, url = start_server(fakes[name])
+        urls.append(url)
+
+    # The predictor reads its configuration at import time
+    os.environ["VERTEX_ENDPOINT_URL"] = ",".join(urls)
+    os.environ.setdefault("ROUTER_PROBE_SECONDS", "2")
+    from Backend.Classification_model import predictor
+
+    with open(args.image, "rb") as f:
+        image = f.read()
+
+    def _one(i):
+        start = time.perf_counter()
+        result = predictor.predict_image_bytes(unique_variant(image, os.urandom(4).hex()), use_cache=False)
+        return time.perf_counter() - start, result is not None
+
+    phases = [
+        ("all healthy", {}),
+        ("fast endpoint failing", {"fast": 1.0}),
+        ("fast endpoint recovered", {"fast": 0.0}),
+    ]
+    for phase, error_rates in phases:
+        for name, rate in error_rates.items():
+            fakes[name].error_rate = rate
+        if phase.endswith("recovered"):
+            time.sleep(float(os.environ["ROUTER_PROBE_SECONDS"]))
+
+        before = {name: fake.calls for name, fake in fakes.items()}
+        with redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            results = list(pool.map(_one, range(args.requests)))
+
+        latencies = [latency for latency, ok in results if ok]
+        share = {name: fake.calls - before[name] for name, fake in fakes.items()}
+        print(f"\n{phase}")
+        print(f"  latency p50/p95: {percentile(latencies, 50) * 1000:.0f} / {percentile(latencies, 95) * 1000:.0f} ms"
+              f", errors: {sum(1 for _, ok in results if not ok)}")
+        print(f"  calls per endpoint: {share}")
+
+    print("\nRouter state:")
+    names = dict(zip(urls, PROFILES))
+    for route in predictor.get_endpoint_routing():
+        print(f"  {names[route['name']]:<7} latency {route['latency_ms_ewma']:.0f} ms, "
+              f"errors {route['error_rate_ewma']:.2f}, healthy {route['healthy']}")
+
+
+if __name__ == "__main__":
+    main()
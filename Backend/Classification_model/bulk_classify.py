@@ -0,0 +1,308 @@
+"""
+Bulk classification of an image folder for backfills and dataset audits.
+Images are read and preprocessed in a process pool, sent in batches with a
+bounded number of requests in flight, and results are streamed to JSONL or
+Parquet (Parquet needs the optional pyarrow package) together with each
+photo's EXIF capture time for meal-history backfill.
+
+Progress is checkpointed after every batch; rerunning the same command after
+an interruption skips images that were already written and retries images
+whose prediction request failed. Request failures (outages, timeouts) are
+only counted, never written, so every image appears once in the output.
+Images that can never succeed (unreadable, invalid or too large) are written
+with their error and not retried.
+
+Run from the project root:
+    python -m Backend.Classification_model.bulk_classify photos/ results.jsonl
+    python -m Backend.Classification_model.bulk_classify photos/ results.parquet --concurrency 8
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import redirect_stdout
+from PIL import Image
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+from Backend.Classification_model.preprocessing import preprocess_image
+from Backend.Classification_model.validation import validate_image_header
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+# Errors that retrying cannot fix; anything else is a failed request
+_PERMANENT_ERRORS = ("preprocessing failed", "invalid image", "image exceeds max payload")
+
+# EXIF tags: DateTimeOriginal lives in the Exif sub-IFD, DateTime in the main IFD
+_EXIF_IFD = 0x8769
+_DATETIME_ORIGINAL = 36867
+_DATETIME = 306
+
+
+def find_images(root):
+    """Image paths under `root` relative to it, in a stable order."""
+    paths = []
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.relpath(os.path.join(directory, name), root))
+    return sorted(paths)
+
+
+def read_taken_at(image_bytes):
+    """
+    Capture time from EXIF as ISO 8601 ("2024-05-01T12:30:00"), or None.
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        exif = image.getexif()
+        value = exif.get_ifd(_EXIF_IFD).get(_DATETIME_ORIGINAL) or exif.get(_DATETIME)
+    if not value:
+        return None
+    # EXIF format is "YYYY:MM:DD HH:MM:SS"
+    date, _, clock = str(value).strip().partition(" ")
+    return f"{date.replace(':', '-')}T{clock}" if clock else date.replace(":", "-")
+
+
+def load_image(root, path):
+    """
+    Process-pool worker: read, timestamp and preprocess one image.
+
+    Returns:
+        tuple: (path, jpeg_bytes or None, taken_at, error or None)
+    """
+    try:
+        with open(os.path.join(root, path), "rb") as f:
+            image_bytes = f.read()
+        validate_image_header(image_bytes)
+        try:
+            taken_at = read_taken_at(image_bytes)
+        except Exception:
+            taken_at = None
+        jpeg, _ = preprocess_image(image_bytes)
+        return path, jpeg, taken_at, None
+    except Exception as e:
+        return path, None, None, f"preprocessing failed: {e}"
+
+
+class JsonlWriter:
+    """Appends one JSON object per line; flushed so a crash loses at most one batch."""
+
+    def __init__(self, path, append=True):
+        self._file = open(path, "a" if append else "w", encoding="utf-8")
+
+    def write(self, records):
+        for record in records:
+            self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """
+    Writes one part file per batch, since a Parquet file is only readable once
+    its footer is written:
+    results.parquet -> results.parquet/part-00000.parquet, part-00001.parquet, ...
+    Each part is written under a temporary name, fsynced and renamed, so it
+    is complete on disk before its paths are checkpointed.
+    """
+
+    def __init__(self, path, append=True):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet output needs `pip install pyarrow`.") from e
+
+        self._pa = pa
+        self._pq = pq
+        self._path = path
+        self._schema = pa.schema([
+            ("path", pa.string()),
+            ("label", pa.string()),
+            ("confidence", pa.float64()),
+            ("top_k", pa.string()),
+            ("taken_at", pa.string()),
+            ("error", pa.string()),
+        ])
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            # Leftovers of a crash mid-write were never checkpointed
+            if name.endswith(".parquet.tmp") or (not append and name.endswith(".parquet")):
+                os.remove(os.path.join(path, name))
+        self._part = len([name for name in os.listdir(path) if name.endswith(".parquet")])
+
+    def write(self, records):
+        rows = [dict(record, top_k=json.dumps(record["top_k"])) for record in records]
+        target = os.path.join(self._path, f"part-{self._part:05d}.parquet")
+        with open(target + ".tmp", "wb") as f:
+            self._pq.write_table(self._pa.Table.from_pylist(rows, schema=self._schema), f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(target + ".tmp", target)
+        self._part += 1
+
+    def close(self):
+        pass
+
+
+def load_checkpoint(path):
+    """Image paths already written by earlier runs."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+def _to_record(path, prediction, taken_at, error):
+    labels = (prediction or {}).get("displayNames") or []
+    scores = (prediction or {}).get("confidences") or []
+    top_idx = scores.index(max(scores)) if scores else None
+    return {
+        "path": path,
+        "label": labels[top_idx] if top_idx is not None else None,
+        "confidence": scores[top_idx] if top_idx is not None else None,
+        "top_k": [[label, score] for label, score in zip(labels, scores)],
+        "taken_at": taken_at,
+        "error": error,
+    }
+
+
+def _classify_batch(batch):
+    """Thread-pool worker: one batched predict call for preloaded images."""
+    from Backend.Classification_model.predictor import predict_images
+
+    result = predict_images([jpeg for _, jpeg, _ in batch], use_cache=False, preprocess=False)
+    return [
+        _to_record(path, prediction, taken_at, result["failed"].get(index))
+        for index, ((path, _, taken_at), prediction) in enumerate(zip(batch, result["predictions"]))
+    ]
+
+
+def classify_folder(root, output, batch_size=16, concurrency=4, workers=None, restart=False):
+    """
+    Classify every image under `root`, streaming results to `output`.
+
+    Args:
+        root (str): Folder to walk
+        output (str): .jsonl file or .parquet path
+        batch_size (int): Images per predict request
+        concurrency (int): Max predict requests in flight
+        workers (int): Preprocessing processes (default: CPU count)
+        restart (bool): Discard the checkpoint and earlier output and classify everything again
+
+    Returns:
+        dict: counts of images found, skipped (already done), written (including
+        permanent errors) and failed (requests to retry on the next run)
+    """
+    checkpoint_path = output.rstrip("/") + ".checkpoint"
+    if restart and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    done = load_checkpoint(checkpoint_path)
+
+    paths = find_images(root)
+    todo = [path for path in paths if path not in done]
+    print(f"📂 {len(paths)} images found, {len(paths) - len(todo)} already done, {len(todo)} to classify.")
+
+    writer_class = ParquetWriter if output.endswith(".parquet") else JsonlWriter
+    writer = writer_class(output, append=not restart)
+    checkpoint = open(checkpoint_path, "a", encoding="utf-8")
+    stats = {"found": len(paths), "skipped": len(paths) - len(todo), "written": 0, "failed": 0}
+    start = time.perf_counter()
+
+    def _write(records):
+        # Failed requests are neither written nor checkpointed, so the next run
+        # retries them without leaving a stale error row behind
+        final = [
+            record for record in records
+            if not record["error"] or record["error"].startswith(_PERMANENT_ERRORS)
+        ]
+        if final:
+            writer.write(final)
+            # Checkpoint only after the results are durable
+            checkpoint.write("".join(record["path"] + "\n" for record in final))
+            checkpoint.flush()
+        stats["written"] += len(final)
+        stats["failed"] += len(records) - len(final)
+        processed = stats["written"] + stats["failed"]
+        rate = processed / (time.perf_counter() - start)
+        print(f"✅ {processed}/{len(todo)} processed, {stats['failed']} failed ({rate:.1f} images/sec)",
+              end="\r", file=sys.stderr, flush=True)
+
+    try:
+        # The predictor logs every request to stdout; progress goes to stderr instead
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull), \
+                ProcessPoolExecutor(max_workers=workers) as processes, \
+                ThreadPoolExecutor(max_workers=concurrency) as requests:
+            # Bounded windows keep memory flat however large the folder is
+            max_loading = batch_size * concurrency * 2
+            remaining = iter(todo)
+            loading = deque()
+            in_flight = set()
+            batch = []
+
+            def _fill():
+                while len(loading) < max_loading:
+                    path = next(remaining, None)
+                    if path is None:
+                        break
+                    loading.append(processes.submit(load_image, root, path))
+
+            def _drain(block):
+                finished = wait(in_flight, return_when=FIRST_COMPLETED)[0] if block else \
+                    [future for future in in_flight if future.done()]
+                for future in finished:
+                    in_flight.discard(future)
+                    _write(future.result())
+
+            def _submit(batch):
+                while len(in_flight) >= concurrency:
+                    _drain(block=True)
+                in_flight.add(requests.submit(_classify_batch, batch))
+                _drain(block=False)
+
+            _fill()
+            while loading:
+                path, jpeg, taken_at, error = loading.popleft().result()
+                _fill()
+                if error:
+                    _write([_to_record(path, None, taken_at, error)])
+                    continue
+                batch.append((path, jpeg, taken_at))
+                if len(batch) >= batch_size:
+                    _submit(batch)
+                    batch = []
+            if batch:
+                _submit(batch)
+            while in_flight:
+                _drain(block=True)
+    finally:
+        writer.close()
+        checkpoint.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"\n🏁 Wrote {stats['written']} results in {elapsed:.1f}s to {output}"
+          f" ({stats['failed']} failed requests, rerun to retry them)")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify every image in a folder.")
+    parser.add_argument("folder")
+    parser.add_argument("output", help="Results file: .jsonl, or .parquet (needs pyarrow)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=4, help="Max predict requests in flight")
+    parser.add_argument("--workers", type=int, default=None, help="Preprocessing processes")
+    parser.add_argument("--restart", action="store_true", help="Discard the checkpoint and earlier output")
+    args = parser.parse_args()
+
+    classify_folder(args.folder, args.output, args.batch_size, args.concurrency, args.workers, args.restart)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""
+Meal video and photo-burst classification.
+Frames are decoded one at a time (never the whole clip), sampled at a fixed
+interval, and frames that look like the last kept one (close dHash) are
+dropped before any encoding. The remaining frames are classified in batches
+and their confidences are averaged into a single prediction.
+
+Video decoding needs the optional PyAV package (`pip install av`) or OpenCV
+(`pip install opencv-python-headless`).
+
+Try it from the project root:
+    python -m Backend.Classification_model.burst path/to/meal.mp4
+"""
+
+from PIL import Image, ImageOps
+import argparse
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from Backend.Classification_model.perceptual_hash import dhash_image
+from Backend.Classification_model.preprocessing import MODEL_INPUT_SIZE, JPEG_QUALITY
+from Backend.Classification_model.validation import validate_image_header, ImageValidationError
+
+# Seconds between sampled video frames and max frames read from one clip
+BURST_SAMPLE_SECONDS = float(os.getenv("BURST_SAMPLE_SECONDS", "0.5"))
+BURST_MAX_FRAMES = int(os.getenv("BURST_MAX_FRAMES", "32"))
+# Frames within this many dHash bits of the last kept frame are dropped
+BURST_MAX_HASH_DISTANCE = int(os.getenv("BURST_MAX_HASH_DISTANCE", "6"))
+# Frames per predict request
+BURST_BATCH_SIZE = int(os.getenv("BURST_BATCH_SIZE", "8"))
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".m4v", ".webm", ".avi")
+
+
+class VideoDecodeError(ValueError):
+    """Raised for clips that cannot be opened or decoded; the message is user-facing."""
+
+
+def _iter_frames_av(source, sample_seconds):
+    import av
+
+    with av.open(source) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        next_time = 0.0
+        for frame in container.decode(stream):
+            # Frames without timestamps are all sampled
+            if frame.time is not None and frame.time < next_time:
+                continue
+            next_time = (frame.time or 0.0) + sample_seconds
+            yield frame.to_image()
+
+
+def _iter_frames_cv2(source, sample_seconds):
+    import cv2
+
+    # OpenCV only reads from a path
+    temp_path = None
+    if not isinstance(source, str):
+        with tempfile.NamedTemporaryFile(suffix=".mp4", delete=False) as tmp:
+            # Copy in chunks so a long clip is never held in memory at once
+            shutil.copyfileobj(source, tmp, 1024 * 1024)
+            temp_path = tmp.name
+
+    capture = cv2.VideoCapture(temp_path or source)
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+        step = max(1, round(fps * sample_seconds))
+        index = 0
+        # grab() advances without converting skipped frames; retrieve() only for sampled ones
+        while capture.grab():
+            if index % step == 0:
+                ok, frame = capture.retrieve()
+                if ok:
+                    yield Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            index += 1
+    finally:
+        capture.release()
+        if temp_path:
+            os.remove(temp_path)
+
+
+def iter_video_frames(source, sample_seconds=None, max_frames=None):
+    """
+    Stream sampled frames of a video.
+
+    Args:
+        source (str or file-like): Video path or open binary file
+        sample_seconds (float): Seconds between sampled frames (default BURST_SAMPLE_SECONDS)
+        max_frames (int): Stop after this many frames (default BURST_MAX_FRAMES)
+
+    Yields:
+        PIL.Image.Image: RGB frames
+
+    Raises:
+        RuntimeError: If neither PyAV nor OpenCV is installed
+        VideoDecodeError: If the clip is corrupt or in an unsupported format
+    """
+    sample_seconds = sample_seconds or BURST_SAMPLE_SECONDS
+    max_frames = max_frames or BURST_MAX_FRAMES
+
+    try:
+        import av  # noqa: F401
+        frames = _iter_frames_av(source, sample_seconds)
+    except ImportError:
+        try:
+            import cv2  # noqa: F401
+        except ImportError as e:
+            raise RuntimeError(
+                "Video input needs `pip install av` or `pip install opencv-python-headless`."
+            ) from e
+        frames = _iter_frames_cv2(source, sample_seconds)
+
+    try:
+        for count, frame in enumerate(frames):
+            if count >= max_frames:
+                frames.close()
+                break
+            yield frame
+    except Exception as e:
+        # Decoder errors (av.error.InvalidDataError, OSError, ...) vary by backend
+        raise VideoDecodeError(f"The video could not be read ({e}).") from e
+
+
+def iter_burst_frames(images, max_frames=None):
+    """
+    Decode a photo burst lazily, one image at a time.
+
+    Args:
+        images (list): Raw image bytes or buffers
+        max_frames (int): Stop after this many images (default BURST_MAX_FRAMES)
+
+    Yields:
+        PIL.Image.Image: RGB images with EXIF orientation applied; invalid
+        images are skipped
+    """
+    max_frames = max_frames or BURST_MAX_FRAMES
+    for image_bytes in images[:max_frames]:
+        try:
+            validate_image_header(image_bytes)
+        except ImageValidationError as e:
+            print(f"⚠️ Skipping burst photo: {e}")
+            continue
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            yield ImageOps.exif_transpose(image).convert("RGB")
+
+
+def _encode_frame(frame):
+    frame.thumbnail((MODEL_INPUT_SIZE, MODEL_INPUT_SIZE), Image.LANCZOS)
+    output = io.BytesIO()
+    frame.save(output, format="JPEG", quality=JPEG_QUALITY)
+    return output.getvalue()
+
+
+def aggregate_predictions(predictions, top_k=5):
+    """
+    Average per-frame confidences into one Vertex-style prediction.
+    A label missing from a frame's top-k counts as 0 for that frame.
+
+    Args:
+        predictions (list): Vertex-style predictions, one per frame
+        top_k (int): Labels kept in the aggregate
+
+    Returns:
+        dict: {"displayNames", "confidences"} sorted by mean confidence
+    """
+    totals = {}
+    for prediction in predictions:
+        for label, score in zip(prediction.get("displayNames") or [], prediction.get("confidences") or []):
+            totals[label] = totals.get(label, 0.0) + score
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    frames = max(len(predictions), 1)
+    return {
+        "displayNames": [label for label, _ in ranked],
+        "confidences": [total / frames for _, total in ranked],
+    }
+
+
+def classify_frames(frames, batch_size=None, max_distance=None):
+    """
+    Drop near-duplicate frames and classify the rest in batches.
+    Only one batch of encoded frames is held in memory at a time.
+
+    Args:
+        frames (iterable): PIL images, e.g. from iter_video_frames
+        batch_size (int): Frames per predict request (default BURST_BATCH_SIZE)
+        max_distance (int): Max dHash distance counted as a duplicate
+            (default BURST_MAX_HASH_DISTANCE)
+
+    Returns:
+        dict: aggregated "prediction" (None if nothing was classified), frame
+        counts ("frames_read", "frames_dropped", "frames_classified",
+        "frames_failed") and "latency_ms"
+    """
+    from Backend.Classification_model.predictor import predict_images, PREDICT_TOP_K
+
+    batch_size = batch_size or BURST_BATCH_SIZE
+    max_distance = BURST_MAX_HASH_DISTANCE if max_distance is None else max_distance
+
+    start = time.perf_counter()
+    predictions, pending = [], []
+    read = dropped = failed = 0
+    last_hash = None
+
+    def _flush():
+        nonlocal failed
+        result = predict_images(pending, use_cache=False, preprocess=False, priority="interactive")
+        predictions.extend(p for p in result["predictions"] if p)
+        failed += len(result["failed"])
+        pending.clear()
+
+    for frame in frames:
+        read += 1
+        frame_hash = dhash_image(frame)
+        if last_hash is not None and bin(frame_hash ^ last_hash).count("1") <= max_distance:
+            dropped += 1
+            continue
+        last_hash = frame_hash
+        pending.append(_encode_frame(frame))
+        if len(pending) >= batch_size:
+            _flush()
+    if pending:
+        _flush()
+
+    latency_ms = (time.perf_counter() - start) * 1000
+    print(f"🎞️ {read} frames read, {dropped} near-duplicates dropped, "
+          f"{len(predictions)} classified ({latency_ms:.0f} ms)")
+    return {
+        "prediction": aggregate_predictions(predictions, PREDICT_TOP_K) if predictions else None,
+        "frames_read": read,
+        "frames_dropped": dropped,
+        "frames_classified": len(predictions),
+        "frames_failed": failed,
+        "latency_ms": latency_ms,
+    }
+
+
+def predict_video(source, sample_seconds=None, max_frames=None):
+    """Classify a meal video. See iter_video_frames and classify_frames."""
+    return classify_frames(iter_video_frames(source, sample_seconds, max_frames))
+
+
+def predict_burst(images, max_frames=None):
+    """Classify a burst of photos of the same meal. See classify_frames."""
+    return classify_frames(iter_burst_frames(images, max_frames))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify a meal video or photo burst.")
+    parser.add_argument("paths", nargs="+", help="One video file, or several photos")
+    parser.add_argument("--sample-seconds", type=float, default=None)
+    parser.add_argument("--max-frames", type=int, default=None)
+    args = parser.parse_args()
+
+    if len(args.paths) == 1 and args.paths[0].lower().endswith(VIDEO_EXTENSIONS):
+        result = predict_video(args.paths[0], args.sample_seconds, args.max_frames)
+    else:
+        images = []
+        for path in args.paths:
+            with open(path, "rb") as f:
+                images.append(f.read())
+        result = predict_burst(images, args.max_frames)
+
+    if result["prediction"] is None:
+        print("❌ No frames could be classified.")
+        return
+    for label, score in zip(result["prediction"]["displayNames"], result["prediction"]["confidences"]):
+        print(f"  {label:<24} {score * 100:5.1f}%")
+
+
+if __name__ == "__main__":
+    main()
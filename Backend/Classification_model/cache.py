@@ -0,0 +1,164 @@
+"""
+Content-addressed cache for Vertex AI predictions.
+Results are keyed by a SHA-256 of the image bytes plus the endpoint they came
+from, held in a bounded in-memory LRU and optionally persisted to SQLite so
+they survive restarts. The SQLite tier is capped too: once it holds more
+than max_db_entries rows, the least recently used ones are deleted.
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+
+class PredictionCache:
+    """
+    Two-tier (memory LRU + optional SQLite) prediction cache.
+
+    Args:
+        max_entries (int): Max predictions kept in memory
+        db_path (str): Optional SQLite file for the persistent tier
+        max_db_entries (int): Max predictions kept in SQLite
+    """
+
+    def __init__(self, max_entries=256, db_path=None, max_db_entries=100000):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.max_db_entries = max_db_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._endpoint_key = None
+        self._conn = None
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                " key TEXT PRIMARY KEY,"
+                " endpoint TEXT NOT NULL,"
+                " prediction TEXT NOT NULL,"
+                " accessed_at REAL NOT NULL DEFAULT 0)"
+            )
+            # Files created before the row cap have no access time column
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(predictions)")]
+            if "accessed_at" not in columns:
+                self._conn.execute("ALTER TABLE predictions ADD COLUMN accessed_at REAL NOT NULL DEFAULT 0")
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS predictions_accessed_at ON predictions (accessed_at)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def make_key(image_bytes, endpoint_key, variant=None):
+        """
+        Cache key for an image as seen by a specific endpoint. `variant` keeps
+        results of a non-default request mode (e.g. no preprocessing) apart
+        from the default ones without invalidating the namespace.
+        """
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        return f"{endpoint_key}:{variant}:{digest}" if variant else f"{endpoint_key}:{digest}"
+
+    def _check_endpoint(self, endpoint_key):
+        """Drop every cached result when the endpoint changes (caller holds the lock)."""
+        if endpoint_key == self._endpoint_key:
+            return
+        if self._endpoint_key is not None:
+            print("♻️ Endpoint changed, invalidating prediction cache.")
+        self._memory.clear()
+        if self._conn:
+            self._conn.execute("DELETE FROM predictions WHERE endpoint != ?", (endpoint_key,))
+            self._conn.commit()
+        self._endpoint_key = endpoint_key
+
+    def get(self, image_bytes, endpoint_key, variant=None):
+        """
+        Look up a cached prediction.
+
+        Returns:
+            The cached prediction, or None on a miss
+        """
+        key = self.make_key(image_bytes, endpoint_key, variant)
+        with self._lock:
+            self._check_endpoint(endpoint_key)
+
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return self._memory[key]
+
+            if self._conn:
+                row = self._conn.execute(
+                    "SELECT prediction FROM predictions WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    self._conn.execute(
+                        "UPDATE predictions SET accessed_at = ? WHERE key = ?", (time.time(), key)
+                    )
+                    self._conn.commit()
+                    prediction = json.loads(row[0])
+                    self._remember(key, prediction)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return prediction
+
+            self.misses += 1
+            return None
+
+    def put(self, image_bytes, endpoint_key, prediction, variant=None):
+        """Store a prediction in both tiers."""
+        key = self.make_key(image_bytes, endpoint_key, variant)
+        with self._lock:
+            self._check_endpoint(endpoint_key)
+            self._remember(key, prediction)
+            if self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO predictions (key, endpoint, prediction, accessed_at)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, endpoint_key, json.dumps(prediction), time.time()),
+                )
+                self._evict_rows()
+                self._conn.commit()
+
+    def _remember(self, key, prediction):
+        """Insert into the memory tier, evicting the least recently used entry."""
+        self._memory[key] = prediction
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_rows(self):
+        """Delete the least recently used rows beyond max_db_entries (caller holds the lock)."""
+        excess = self._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0] - self.max_db_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM predictions WHERE key IN"
+                " (SELECT key FROM predictions ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+
+    def clear(self):
+        """Remove every cached prediction from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn:
+                self._conn.execute("DELETE FROM predictions")
+                self._conn.commit()
+
+    def stats(self):
+        """Hit/miss counters and current memory size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
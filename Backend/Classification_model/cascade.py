@@ -0,0 +1,81 @@
+"""
+Two-stage prediction cascade.
+Most clear food photos classify confidently from a small thumbnail, so the
+cascade sends a heavily downscaled image first and only escalates to the
+full-resolution upload when the top confidence is below a threshold.
+"""
+
+import threading
+
+from Backend.Classification_model.preprocessing import preprocess_image
+
+
+def top_confidence(prediction):
+    """Highest confidence in a Vertex-style prediction (0.0 if empty)."""
+    return max(prediction.get("confidences") or [0.0])
+
+
+class PredictionCascade:
+    """
+    Thumbnail-first classification with full-resolution fallback.
+
+    Args:
+        threshold (float): Min top-1 confidence to accept the thumbnail result
+        thumbnail_side (int): Longest side of the first-stage image in pixels
+        thumbnail_quality (int): JPEG quality of the first-stage image
+    """
+
+    def __init__(self, threshold=0.8, thumbnail_side=160, thumbnail_quality=75):
+        self.threshold = threshold
+        self.thumbnail_side = thumbnail_side
+        self.thumbnail_quality = thumbnail_quality
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.escalations = 0
+        self.bytes_sent = 0
+        self.bytes_full_only = 0
+
+    def predict(self, backend, image_bytes):
+        """
+        Classify an image through the cascade.
+
+        Args:
+            backend (PredictorBackend): Backend used for both stages
+            image_bytes (bytes): Raw upload
+
+        Returns:
+            list: Predictions from whichever stage was accepted
+        """
+        # The raw upload is decoded once; the thumbnail comes from the small
+        # full-resolution JPEG, which is also needed to account for savings
+        full, _ = preprocess_image(image_bytes)
+        thumbnail, _ = preprocess_image(full, max_side=self.thumbnail_side, quality=self.thumbnail_quality)
+
+        predictions = backend.predict([thumbnail])
+        sent = len(thumbnail)
+        confidence = top_confidence(predictions[0]) if predictions else 0.0
+        escalated = confidence < self.threshold
+
+        if escalated:
+            print(f"🔎 Thumbnail confidence {confidence:.2f} < {self.threshold}, sending full resolution...")
+            predictions = backend.predict([full])
+            sent += len(full)
+
+        with self._lock:
+            self.requests += 1
+            self.escalations += int(escalated)
+            self.bytes_sent += sent
+            self.bytes_full_only += len(full)
+        return predictions
+
+    def stats(self):
+        """Escalation rate and bytes saved versus always sending full resolution."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "escalations": self.escalations,
+                "escalation_rate": self.escalations / self.requests if self.requests else 0.0,
+                "bytes_sent": self.bytes_sent,
+                "bytes_saved": self.bytes_full_only - self.bytes_sent,
+            }
@@ -0,0 +1,275 @@
+"""
+Offline accuracy and throughput evaluation of a predictor backend.
+Runs a labeled folder (one sub-folder per class, e.g. eval/pizza/001.jpg)
+through the Vertex or local backend and writes a JSON report with top-1 and
+top-5 accuracy, expected calibration error, a confusion matrix, images/sec
+and request latency percentiles.
+Files that fail validation or preprocessing are skipped and listed in the
+report instead of aborting the run.
+
+Pass a previous report as --baseline to fail (exit code 1) when accuracy or
+speed regressed between model versions.
+
+Run from the project root:
+    python -m Backend.Classification_model.evaluate eval/ --backend local --report report.json
+    python -m Backend.Classification_model.evaluate eval/ --baseline report.json
+"""
+
+from contextlib import redirect_stdout
+import argparse
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from Backend.Classification_model.batcher import percentile
+from Backend.Classification_model.preprocessing import preprocess_image
+from Backend.Classification_model.validation import validate_image_header
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+def normalize_label(label):
+    """Folder names and model labels compare as lowercase with underscores ("Apple Pie" -> "apple_pie")."""
+    return label.strip().lower().replace(" ", "_")
+
+
+def find_labeled_images(root):
+    """
+    (path, label) pairs from a folder with one sub-folder per class.
+    """
+    samples = []
+    for label in sorted(os.listdir(root)):
+        class_dir = os.path.join(root, label)
+        if not os.path.isdir(class_dir):
+            continue
+        for name in sorted(os.listdir(class_dir)):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                samples.append((os.path.join(class_dir, name), normalize_label(label)))
+    return samples
+
+
+def expected_calibration_error(confidences, correct, bins=15):
+    """
+    Gap between confidence and accuracy, averaged over equal-width confidence
+    bins and weighted by how many predictions fall in each bin.
+
+    Args:
+        confidences (np.ndarray): Top-1 confidence per image
+        correct (np.ndarray): 1 where the top-1 label was right
+        bins (int): Number of confidence bins
+
+    Returns:
+        float: ECE in [0, 1]
+    """
+    if len(confidences) == 0:
+        return 0.0
+    bin_index = np.minimum((confidences * bins).astype(int), bins - 1)
+    counts = np.bincount(bin_index, minlength=bins)
+    confidence_sums = np.bincount(bin_index, weights=confidences, minlength=bins)
+    correct_sums = np.bincount(bin_index, weights=correct, minlength=bins)
+    return float(np.abs(correct_sums - confidence_sums).sum() / len(confidences))
+
+
+def compute_metrics(true_labels, predictions, top_k=5):
+    """
+    Accuracy, calibration and confusion matrix from predictions.
+
+    Args:
+        true_labels (list): Normalized true label per image
+        predictions (list): Vertex-style prediction per image (None for failures,
+            which count as wrong)
+        top_k (int): k for top-k accuracy
+
+    Returns:
+        dict: metrics ready for the JSON report
+    """
+    ranked = []
+    for prediction in predictions:
+        labels = [normalize_label(label) for label in (prediction or {}).get("displayNames") or []]
+        scores = (prediction or {}).get("confidences") or []
+        ranked.append(sorted(zip(scores, labels), reverse=True))
+
+    classes = sorted(set(true_labels) | {pairs[0][1] for pairs in ranked if pairs})
+    class_index = {label: i for i, label in enumerate(classes)}
+    # Failed predictions go to an extra "no prediction" column
+    true_idx = np.array([class_index[label] for label in true_labels], dtype=int)
+    pred_idx = np.array([class_index[pairs[0][1]] if pairs else len(classes) for pairs in ranked], dtype=int)
+    confidences = np.array([pairs[0][0] if pairs else 0.0 for pairs in ranked], dtype=float)
+    in_top_k = np.array([
+        label in [name for _, name in pairs[:top_k]] for label, pairs in zip(true_labels, ranked)
+    ], dtype=bool)
+
+    confusion = np.zeros((len(classes), len(classes) + 1), dtype=int)
+    np.add.at(confusion, (true_idx, pred_idx), 1)
+
+    correct = (true_idx == pred_idx).astype(float)
+    support = confusion.sum(axis=1)
+    predicted = confusion[:, :len(classes)].sum(axis=0)
+    hits = np.diag(confusion[:, :len(classes)])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        recall = np.where(support > 0, hits / support, 0.0)
+        precision = np.where(predicted > 0, hits / predicted, 0.0)
+
+    return {
+        "top1_accuracy": float(correct.mean()) if len(correct) else 0.0,
+        f"top{top_k}_accuracy": float(in_top_k.mean()) if len(in_top_k) else 0.0,
+        "expected_calibration_error": expected_calibration_error(confidences, correct),
+        "mean_confidence": float(confidences.mean()) if len(confidences) else 0.0,
+        "per_class": {
+            label: {"precision": float(precision[i]), "recall": float(recall[i]), "support": int(support[i])}
+            for i, label in enumerate(classes) if support[i] or predicted[i]
+        },
+        "confusion_matrix": {
+            "labels": classes + ["<no prediction>"],
+            "matrix": confusion.tolist(),
+        },
+    }
+
+
+def evaluate(root, backend_name=None, batch_size=16, limit=None):
+    """
+    Run a labeled folder through a backend.
+
+    Args:
+        root (str): Folder with one sub-folder per class
+        backend_name (str): "vertex" or "local" (default PREDICTOR_BACKEND)
+        batch_size (int): Images per predict call
+        limit (int): Evaluate only the first N images
+
+    Returns:
+        dict: The evaluation report
+    """
+    from Backend.Classification_model.predictor import get_backend
+
+    backend = get_backend(backend_name)
+    samples = find_labeled_images(root)[:limit]
+    if not samples:
+        raise ValueError(f"No labeled images found under {root}")
+
+    predictions, latencies = [], []
+    evaluated, skipped = [], []
+    failed = 0
+    start = time.perf_counter()
+    for offset in range(0, len(samples), batch_size):
+        # Corrupt or unsupported files are reported and left out of the metrics
+        batch, images = [], []
+        for path, label in samples[offset:offset + batch_size]:
+            try:
+                with open(path, "rb") as f:
+                    image_bytes = f.read()
+                validate_image_header(image_bytes)
+                images.append(preprocess_image(image_bytes)[0])
+            except Exception as e:
+                skipped.append({"path": path, "error": str(e)})
+                continue
+            batch.append((path, label))
+        evaluated.extend(batch)
+        if not batch:
+            continue
+
+        request_start = time.perf_counter()
+        try:
+            with redirect_stdout(io.StringIO()):
+                batch_predictions = backend.predict(images)
+        except Exception as e:
+            print(f"⚠️ Batch at image {offset} failed: {e}", file=sys.stderr)
+            batch_predictions = [None] * len(batch)
+            failed += len(batch)
+        latencies.append(time.perf_counter() - request_start)
+        predictions.extend(batch_predictions)
+        print(f"🔍 {len(predictions) + len(skipped)}/{len(samples)} images", end="\r", file=sys.stderr, flush=True)
+    elapsed = time.perf_counter() - start
+    print(file=sys.stderr)
+    for item in skipped:
+        print(f"⚠️ Skipped {item['path']}: {item['error']}", file=sys.stderr)
+    if not evaluated:
+        raise ValueError(f"None of the {len(samples)} images under {root} could be read")
+
+    report = {
+        "backend": backend.name,
+        "model": backend.cache_namespace,
+        "images": len(evaluated),
+        "failed": failed,
+        "skipped": len(skipped),
+        "skipped_images": skipped,
+        "batch_size": batch_size,
+        "images_per_sec": len(evaluated) / elapsed,
+        "request_latency_ms": {
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+        },
+    }
+    report.update(compute_metrics([label for _, label in evaluated], predictions))
+    return report
+
+
+def find_regressions(report, baseline, max_accuracy_drop=0.01, max_slowdown=0.2):
+    """
+    Compare a report with a baseline report.
+
+    Args:
+        max_accuracy_drop (float): Allowed absolute drop in top-1/top-5 accuracy
+        max_slowdown (float): Allowed relative drop in images/sec and rise in p95 latency
+
+    Returns:
+        list: Human-readable regression messages (empty if none)
+    """
+    regressions = []
+    for metric in ("top1_accuracy", "top5_accuracy"):
+        if metric in baseline and report.get(metric, 0.0) < baseline[metric] - max_accuracy_drop:
+            regressions.append(f"{metric} dropped from {baseline[metric]:.3f} to {report[metric]:.3f}")
+    if report["images_per_sec"] < baseline["images_per_sec"] * (1 - max_slowdown):
+        regressions.append(
+            f"throughput dropped from {baseline['images_per_sec']:.1f} to {report['images_per_sec']:.1f} images/sec"
+        )
+    before, after = baseline["request_latency_ms"]["p95"], report["request_latency_ms"]["p95"]
+    if after > before * (1 + max_slowdown):
+        regressions.append(f"p95 request latency rose from {before:.0f} to {after:.0f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate classifier accuracy and throughput.")
+    parser.add_argument("folder", help="Labeled folder: one sub-folder per class")
+    parser.add_argument("--backend", default=None, help="vertex or local (default PREDICTOR_BACKEND)")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--report", default="evaluation_report.json")
+    parser.add_argument("--baseline", default=None, help="Earlier report to compare against")
+    parser.add_argument("--max-accuracy-drop", type=float, default=0.01)
+    parser.add_argument("--max-slowdown", type=float, default=0.2)
+    args = parser.parse_args()
+
+    report = evaluate(args.folder, args.backend, args.batch_size, args.limit)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(
+        f"Images:       {report['images']} ({report['failed']} failed, {report['skipped']} skipped)"
+        f" on {report['backend']}"
+    )
+    print(f"Top-1 / top-5: {report['top1_accuracy'] * 100:.1f}% / {report['top5_accuracy'] * 100:.1f}%")
+    print(f"ECE:          {report['expected_calibration_error']:.3f}")
+    print(f"Throughput:   {report['images_per_sec']:.1f} images/sec")
+    latency = report["request_latency_ms"]
+    print(f"Latency:      p50 {latency['p50']:.0f} ms, p95 {latency['p95']:.0f} ms, p99 {latency['p99']:.0f} ms")
+    print(f"📄 Report written to {args.report}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = find_regressions(report, baseline, args.max_accuracy_drop, args.max_slowdown)
+        for message in regressions:
+            print(f"❌ Regression: {message}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
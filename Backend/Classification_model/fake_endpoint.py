@@ -0,0 +1,252 @@
+"""
+Local stand-in for the Vertex AI endpoint.
+Returns Food-101 style classification responses with simulated latency and
+errors so the prediction path can be exercised and benchmarked without
+Google credentials.
+
+FakeEndpoint is used in-process; the same behaviour is also served over HTTP
+(Vertex REST ":predict" shape) for end-to-end benchmarks:
+    python -m Backend.Classification_model.fake_endpoint --port 8081 \
+        --distribution lognormal --latency-ms 150 --spread 0.4 --error-rate 0.02
+Point the app at it with VERTEX_ENDPOINT_URL=http://localhost:8081/v1/projects/local/locations/local/endpoints/fake
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+
+from Backend.Classification_model.nutrition import load_food_labels
+
+
+class FakeEndpointError(Exception):
+    """Simulated server-side failure (carries a retryable 503 status code)."""
+
+    code = 503
+
+
+def fake_prediction(content, labels, parameters=None):
+    """
+    Build one realistic prediction for an encoded image.
+    The top label is derived from the image content so repeated images get
+    the same answer.
+    """
+    digest = hashlib.sha256(content.encode("utf-8")).digest()
+    rng = random.Random(digest)
+
+    top = labels[int.from_bytes(digest[:4], "big") % len(labels)]
+    top_confidence = rng.uniform(0.45, 0.99)
+
+    # Spread the remaining probability mass over the other classes
+    others = [label for label in labels if label != top]
+    weights = [rng.random() ** 4 for _ in others]
+    scale = (1 - top_confidence) / sum(weights)
+    scored = [(top, top_confidence)] + [(label, w * scale) for label, w in zip(others, weights)]
+    scored.sort(key=lambda item: item[1], reverse=True)
+
+    parameters = parameters or {}
+    threshold = parameters.get("confidenceThreshold", 0.0)
+    scored = [item for item in scored if item[1] >= threshold]
+    if "maxPredictions" in parameters:
+        scored = scored[:int(parameters["maxPredictions"])]
+
+    return {
+        "ids": [str(labels.index(label)) for label, _ in scored],
+        "displayNames": [label for label, _ in scored],
+        "confidences": [round(score, 6) for _, score in scored],
+    }
+
+
+def sample_latency(rng, distribution, base, jitter, per_instance, n_instances):
+    """
+    Draw one simulated request latency in seconds.
+
+    Args:
+        rng (random.Random): Random source
+        distribution (str): "uniform" (base + U(0, jitter)), "normal" (mean base,
+            std jitter) or "lognormal" (median base, sigma jitter)
+        base (float): Base latency in seconds
+        jitter (float): Spread parameter (see distribution)
+        per_instance (float): Extra seconds per instance in the request
+        n_instances (int): Instances in the request
+    """
+    if distribution == "normal":
+        delay = rng.gauss(base, jitter)
+    elif distribution == "lognormal":
+        delay = rng.lognormvariate(0, jitter) * base
+    else:
+        delay = base + rng.uniform(0, jitter)
+    return max(0.0, delay) + per_instance * n_instances
+
+
+class FakeEndpoint:
+    """
+    Drop-in replacement for aiplatform.Endpoint.predict.
+
+    Args:
+        base_latency (float): Seconds added to every request
+        per_instance_latency (float): Seconds added per instance in the request
+        jitter (float): Latency spread (see sample_latency)
+        distribution (str): "uniform", "normal" or "lognormal"
+        error_rate (float): Probability that a request fails with FakeEndpointError
+        labels (list): Class names (defaults to the Food-101 classes)
+        seed (int): Seed for latency and error sampling
+    """
+
+    def __init__(self, base_latency=0.15, per_instance_latency=0.01, jitter=0.05,
+                 error_rate=0.0, labels=None, seed=None, distribution="uniform"):
+        self.base_latency = base_latency
+        self.per_instance_latency = per_instance_latency
+        self.jitter = jitter
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self.labels = labels or load_food_labels()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        self.calls = 0
+        self.instances = 0
+
+    def predict(self, instances, parameters=None, timeout=None):
+        with self._lock:
+            self.calls += 1
+            self.instances += len(instances)
+            delay = sample_latency(
+                self._rng, self.distribution, self.base_latency, self.jitter,
+                self.per_instance_latency, len(instances),
+            )
+            failed = self._rng.random() < self.error_rate
+
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Fake endpoint did not answer within {timeout:.2f}s")
+        time.sleep(delay)
+
+        if failed:
+            raise FakeEndpointError("Simulated endpoint failure")
+
+        return SimpleNamespace(
+            predictions=[fake_prediction(instance["content"], self.labels, parameters) for instance in instances]
+        )
+
+
+class _PredictHandler(BaseHTTPRequestHandler):
+    """Serves POST .../endpoints/<id>:predict using the server's FakeEndpoint."""
+
+    def do_POST(self):
+        if not self.path.endswith(":predict"):
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+            return
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        try:
+            response = self.server.endpoint.predict(body.get("instances", []), body.get("parameters"))
+        except FakeEndpointError as e:
+            self._send_json(503, {"error": {"code": 503, "message": str(e), "status": "UNAVAILABLE"}})
+            return
+        self._send_json(200, {"predictions": response.predictions, "deployedModelId": "fake"})
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Keep benchmark output readable
+        pass
+
+
+def start_server(endpoint, host="127.0.0.1", port=0):
+    """
+    Serve a FakeEndpoint over HTTP in a background thread.
+
+    Returns:
+        tuple: (server, base_url); base_url ends in the endpoint resource path
+    """
+    server = ThreadingHTTPServer((host, port), _PredictHandler)
+    server.daemon_threads = True
+    server.endpoint = endpoint
+    threading.Thread(target=server.serve_forever, name="fake-endpoint", daemon=True).start()
+    url = f"http://{host}:{server.server_address[1]}/v1/projects/local/locations/local/endpoints/fake"
+    return server, url
+
+
+def start_grpc_server(endpoint, host="127.0.0.1", port=0):
+    """
+    Serve a FakeEndpoint as a plain-text gRPC PredictionService (needs grpcio
+    and google-cloud-aiplatform), for testing GrpcEndpoint without Google.
+
+    Returns:
+        tuple: (server, target) where target is "host:port"
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    import grpc
+    from google.cloud.aiplatform_v1.types import PredictRequest, PredictResponse
+    from google.protobuf import json_format, struct_pb2
+
+    def _predict(request, context):
+        instances = [json_format.MessageToDict(value) for value in request._pb.instances]
+        parameters = json_format.MessageToDict(request._pb.parameters) if request._pb.HasField("parameters") else None
+        try:
+            predictions = endpoint.predict(instances, parameters).predictions
+        except FakeEndpointError as e:
+            context.abort(grpc.StatusCode.UNAVAILABLE, str(e))
+        response = PredictResponse()
+        for prediction in predictions:
+            response._pb.predictions.append(json_format.ParseDict(prediction, struct_pb2.Value()))
+        return response
+
+    handler = grpc.method_handlers_generic_handler(
+        "google.cloud.aiplatform.v1.PredictionService",
+        {
+            "Predict": grpc.unary_unary_rpc_method_handler(
+                _predict,
+                request_deserializer=PredictRequest.deserialize,
+                response_serializer=PredictResponse.serialize,
+            )
+        },
+    )
+    server = grpc.server(ThreadPoolExecutor(max_workers=16))
+    server.add_generic_rpc_handlers((handler,))
+    port = server.add_insecure_port(f"{host}:{port}")
+    server.start()
+    return server, f"{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Vertex AI prediction endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--distribution", choices=["uniform", "normal", "lognormal"], default="lognormal")
+    parser.add_argument("--latency-ms", type=float, default=150, help="Base/median latency")
+    parser.add_argument("--spread", type=float, default=0.3,
+                        help="Latency spread: ms for uniform/normal, sigma (unitless) for lognormal")
+    parser.add_argument("--per-instance-ms", type=float, default=10)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    jitter = args.spread if args.distribution == "lognormal" else args.spread / 1000
+    endpoint = FakeEndpoint(
+        base_latency=args.latency_ms / 1000,
+        per_instance_latency=args.per_instance_ms / 1000,
+        jitter=jitter,
+        error_rate=args.error_rate,
+        distribution=args.distribution,
+    )
+    server, url = start_server(endpoint, args.host, args.port)
+    print(f"🧪 Fake endpoint listening on {url}:predict")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
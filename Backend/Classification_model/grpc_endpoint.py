@@ -0,0 +1,160 @@
+"""
+Long-lived gRPC channel to the Vertex AI PredictionService.
+aiplatform.Endpoint.predict hides connection management, so the first call
+after start-up or a long idle period pays DNS, TCP, TLS, HTTP/2 and OAuth
+token setup. GrpcEndpoint owns one PredictionServiceClient whose channel
+sends keepalive pings so it stays open between requests, can be warmed up
+at start-up, and reports how often requests reused a ready connection.
+"""
+
+from types import SimpleNamespace
+import threading
+import time
+
+from Backend.Classification_model.batcher import percentile
+
+
+class GrpcEndpoint:
+    """
+    Drop-in replacement for aiplatform.Endpoint over a persistent gRPC channel.
+
+    Args:
+        endpoint_name (str): "projects/<project>/locations/<region>/endpoints/<id>"
+        api_endpoint (str): "<region>-aiplatform.googleapis.com" or host:port
+        credentials (google.auth.credentials.Credentials): None for application
+            default credentials; scoped here so warm_up refreshes the exact
+            object the channel signs requests with
+        keepalive_seconds (float): Interval between keepalive pings on the channel
+        insecure (bool): Plain-text channel without credentials (local test servers)
+    """
+
+    def __init__(self, endpoint_name, api_endpoint, credentials=None, keepalive_seconds=30.0, insecure=False):
+        # Heavy imports kept out of module import time
+        import grpc
+        from google.cloud.aiplatform_v1.services.prediction_service import PredictionServiceClient
+        from google.cloud.aiplatform_v1.services.prediction_service.transports import (
+            PredictionServiceGrpcTransport,
+        )
+
+        self.endpoint_name = endpoint_name
+        self.api_endpoint = api_endpoint
+        self._grpc = grpc
+
+        if not insecure:
+            import google.auth
+            from google.auth.credentials import with_scopes_if_required
+
+            # Unscoped service account credentials cannot mint a token
+            if credentials is None:
+                credentials, _ = google.auth.default(scopes=PredictionServiceGrpcTransport.AUTH_SCOPES)
+            else:
+                credentials = with_scopes_if_required(credentials, PredictionServiceGrpcTransport.AUTH_SCOPES)
+        self.credentials = credentials
+
+        options = [
+            ("grpc.keepalive_time_ms", int(keepalive_seconds * 1000)),
+            ("grpc.keepalive_timeout_ms", 10000),
+            # Keep pinging while idle, which is exactly when the connection would be dropped
+            ("grpc.keepalive_permit_without_calls", 1),
+            ("grpc.http2.max_pings_without_data", 0),
+            ("grpc.max_send_message_length", -1),
+            ("grpc.max_receive_message_length", -1),
+        ]
+        if insecure:
+            self._channel = grpc.insecure_channel(api_endpoint, options=options)
+        else:
+            self._channel = PredictionServiceGrpcTransport.create_channel(
+                api_endpoint if ":" in api_endpoint else f"{api_endpoint}:443",
+                credentials=credentials,
+                options=options,
+            )
+        transport = PredictionServiceGrpcTransport(host=api_endpoint, channel=self._channel)
+        self._client = PredictionServiceClient(transport=transport)
+
+        self._lock = threading.Lock()
+        self._state = None
+        self._channel.subscribe(self._on_state_change, try_to_connect=False)
+
+        self.requests = 0
+        self.reused = 0
+        self.connects = 0
+        self.first_call_latency = None
+        self._latencies = []
+
+    def _on_state_change(self, state):
+        with self._lock:
+            if state == self._grpc.ChannelConnectivity.READY and self._state != state:
+                self.connects += 1
+            self._state = state
+
+    def warm_up(self, timeout=10.0):
+        """
+        Open the connection (TCP, TLS, HTTP/2) and fetch an access token
+        before the first real request. The token is cached on the same
+        credentials object the channel uses, so the first call reuses it.
+
+        Returns:
+            float: Seconds the warm-up took
+        """
+        start = time.perf_counter()
+        self._grpc.channel_ready_future(self._channel).result(timeout=timeout)
+        if self.credentials is not None and not self.credentials.valid:
+            from google.auth.transport.requests import Request
+
+            self.credentials.refresh(Request())
+        return time.perf_counter() - start
+
+    def predict(self, instances, parameters=None, timeout=None):
+        from google.protobuf import json_format, struct_pb2
+
+        request_instances = [json_format.ParseDict(instance, struct_pb2.Value()) for instance in instances]
+        request_parameters = json_format.ParseDict(parameters, struct_pb2.Value()) if parameters else None
+
+        with self._lock:
+            warm = self._state == self._grpc.ChannelConnectivity.READY
+
+        start = time.perf_counter()
+        response = self._client.predict(
+            endpoint=self.endpoint_name,
+            instances=request_instances,
+            parameters=request_parameters,
+            timeout=timeout,
+        )
+        latency = time.perf_counter() - start
+
+        with self._lock:
+            self.requests += 1
+            self.reused += int(warm)
+            if self.first_call_latency is None:
+                self.first_call_latency = latency
+            else:
+                self._latencies.append(latency)
+                del self._latencies[:-1000]
+
+        return SimpleNamespace(
+            predictions=[json_format.MessageToDict(value) for value in response._pb.predictions],
+            deployed_model_id=response.deployed_model_id,
+        )
+
+    def stats(self):
+        """
+        Connection reuse and latency.
+
+        Returns:
+            dict: requests, requests sent on an already-ready connection,
+            connections opened, first-call latency and steady-state percentiles (ms)
+        """
+        with self._lock:
+            latencies = list(self._latencies)
+            return {
+                "requests": self.requests,
+                "reused_connection": self.reused,
+                "reuse_rate": self.reused / self.requests if self.requests else 0.0,
+                "connects": self.connects,
+                "first_call_ms": (self.first_call_latency or 0.0) * 1000,
+                "steady_ms_p50": percentile(latencies, 50) * 1000,
+                "steady_ms_p95": percentile(latencies, 95) * 1000,
+            }
+
+    def close(self):
+        self._channel.close()
@@ -0,0 +1,82 @@
+"""
+REST client for a Vertex AI style ":predict" URL.
+Used to point the predictor at the local fake endpoint (or any other
+compatible server) via VERTEX_ENDPOINT_URL, without Google credentials.
+"""
+
+from types import SimpleNamespace
+import json
+import threading
+
+import requests
+
+
+class HttpEndpointError(Exception):
+    """Non-2xx response; `code` carries the HTTP status for retry decisions."""
+
+    def __init__(self, code, message):
+        super().__init__(f"HTTP {code}: {message}")
+        self.code = code
+
+
+class HttpEndpoint:
+    """
+    Minimal stand-in for aiplatform.Endpoint that talks JSON over HTTP.
+
+    Args:
+        url (str): Endpoint resource URL; ":predict" is appended per request
+        headers (dict): Extra request headers (e.g. Authorization)
+    """
+
+    def __init__(self, url, headers=None):
+        self.url = url.rstrip("/")
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def _session(self):
+        """One keep-alive session per thread (requests.Session is not thread-safe)."""
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def predict(self, instances, parameters=None, timeout=None):
+        body = {"instances": instances}
+        if parameters:
+            body["parameters"] = parameters
+        data = json.dumps(body).encode("utf-8")
+
+        try:
+            response = self._session().post(
+                f"{self.url}:predict", data=data, headers=self.headers, timeout=timeout
+            )
+        except requests.Timeout as e:
+            raise TimeoutError(str(e)) from e
+        except requests.ConnectionError as e:
+            raise ConnectionError(str(e)) from e
+
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += len(data)
+            self.bytes_received += len(response.content)
+
+        if not response.ok:
+            raise HttpEndpointError(response.status_code, response.text[:200])
+
+        payload = response.json()
+        return SimpleNamespace(
+            predictions=payload.get("predictions", []),
+            deployed_model_id=payload.get("deployedModelId"),
+        )
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "bytes_sent": self.bytes_sent,
+                "bytes_received": self.bytes_received,
+            }
@@ -0,0 +1,279 @@
+"""
+Persistent background job queue for prediction work.
+Jobs are rows in a SQLite table, so queued work survives app restarts. A
+pool of worker threads claims jobs, retries failures with exponential
+backoff, and wakes up waiters as soon as a job finishes. Handlers raise
+PermanentJobError for jobs that can never succeed, which fail without
+retries. Queue depth and wait times are exposed through metrics().
+"""
+
+from collections import deque
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from Backend.Classification_model.batcher import percentile
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler for a job that would fail the same way on every attempt."""
+
+
+class JobQueue:
+    """
+    SQLite-backed job queue with a worker pool.
+
+    Args:
+        handler (callable): Takes a job's payload (bytes) and returns a
+            JSON-serializable result; raising marks the attempt as failed,
+            raising PermanentJobError fails the job without retries
+        db_path (str): SQLite file holding the jobs
+        workers (int): Worker threads
+        max_attempts (int): Attempts before a job is marked failed
+        retry_delay (float): Seconds before the first retry; doubles per attempt
+        retention (float): Seconds finished jobs are kept before being purged
+        stale_after (float): Seconds after which a running job is assumed to
+            belong to a process that died, and is queued again
+    """
+
+    def __init__(self, handler, db_path="prediction_jobs.db", workers=2, max_attempts=3,
+                 retry_delay=2.0, retention=86400.0, stale_after=300.0):
+        self.handler = handler
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.retention = retention
+        self.stale_after = stale_after
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        self._changed = threading.Condition()
+        self._waits = deque(maxlen=500)
+        self._stopping = threading.Event()
+
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " payload BLOB,"
+            " status TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " result TEXT,"
+            " error TEXT,"
+            " created_at REAL NOT NULL,"
+            " available_at REAL NOT NULL,"
+            " started_at REAL,"
+            " finished_at REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, available_at)")
+        self._conn.commit()
+        self._recover()
+
+        self._workers = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True) for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def enqueue(self, payload, job_id=None):
+        """
+        Add a job.
+
+        Args:
+            payload (bytes): Handler input, e.g. image bytes
+            job_id (str): Optional id; enqueueing an id that already exists
+                returns it without adding a duplicate job
+
+        Returns:
+            str: The job id
+        """
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        with self._db_lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO jobs (id, payload, status, created_at, available_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (job_id, bytes(payload), QUEUED, now, now),
+            )
+            self._conn.commit()
+        with self._changed:
+            self._changed.notify_all()
+        return job_id
+
+    def get(self, job_id):
+        """
+        Current state of a job.
+
+        Returns:
+            dict: "id", "status", "attempts", "result", "error", or None if unknown
+        """
+        with self._db_lock:
+            row = self._conn.execute(
+                "SELECT status, attempts, result, error FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        status, attempts, result, error = row
+        return {
+            "id": job_id,
+            "status": status,
+            "attempts": attempts,
+            "result": json.loads(result) if result is not None else None,
+            "error": error,
+        }
+
+    def wait(self, job_id, timeout=None):
+        """
+        Block until a job finishes or `timeout` seconds pass.
+
+        Returns:
+            dict: The job as returned by get(); check "status" for a timeout
+        """
+        expires_at = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] in (DONE, FAILED):
+                return job
+            remaining = None if expires_at is None else expires_at - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return job
+            with self._changed:
+                # Also re-check periodically in case another process finished it
+                self._changed.wait(timeout=min(remaining, 1.0) if remaining is not None else 1.0)
+
+    def _claim(self):
+        """Mark the oldest runnable job as running and return (id, payload), or None."""
+        now = time.time()
+        with self._db_lock:
+            while True:
+                row = self._conn.execute(
+                    "SELECT id, payload, available_at FROM jobs WHERE status = ? AND available_at <= ?"
+                    " ORDER BY available_at LIMIT 1",
+                    (QUEUED, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                # Only the worker whose update flips the status owns the job; another
+                # process sharing the file may have claimed it since the SELECT
+                claimed = self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1, started_at = ?"
+                    " WHERE id = ? AND status = ?",
+                    (RUNNING, now, row[0], QUEUED),
+                ).rowcount
+                self._conn.commit()
+                if claimed:
+                    break
+        self._waits.append(now - row[2])
+        return row[0], row[1]
+
+    def _finish(self, job_id, result=None, error=None, retry=True):
+        now = time.time()
+        with self._db_lock:
+            if error is None:
+                # The payload is no longer needed once the result is stored
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = NULL, payload = NULL, finished_at = ?"
+                    " WHERE id = ?",
+                    (DONE, json.dumps(result), now, job_id),
+                )
+            else:
+                attempts = self._conn.execute("SELECT attempts FROM jobs WHERE id = ?", (job_id,)).fetchone()[0]
+                if retry and attempts < self.max_attempts:
+                    delay = self.retry_delay * 2 ** (attempts - 1)
+                    print(f"🔁 Job {job_id[:8]} failed ({error}), retrying in {delay:.1f}s...")
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, available_at = ? WHERE id = ?",
+                        (QUEUED, error, now + delay, job_id),
+                    )
+                else:
+                    print(f"❌ Job {job_id[:8]} failed after {attempts} attempt(s): {error}")
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, payload = NULL, finished_at = ? WHERE id = ?",
+                        (FAILED, error, now, job_id),
+                    )
+            self._conn.commit()
+        with self._changed:
+            self._changed.notify_all()
+
+    def _recover(self):
+        """
+        Queue again jobs left running by a process that stopped. Only jobs
+        running for longer than stale_after are touched, so jobs that another
+        live process sharing the file is working on are left alone.
+        """
+        with self._db_lock:
+            recovered = self._conn.execute(
+                "UPDATE jobs SET status = ? WHERE status = ? AND started_at < ?",
+                (QUEUED, RUNNING, time.time() - self.stale_after),
+            ).rowcount
+            self._conn.commit()
+        if recovered:
+            print(f"♻️ Re-queued {recovered} interrupted prediction jobs.")
+
+    def _purge(self):
+        """Delete finished jobs older than the retention period."""
+        with self._db_lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+                (DONE, FAILED, time.time() - self.retention),
+            )
+            self._conn.commit()
+
+    def _work(self):
+        last_purge, last_recover = 0.0, time.monotonic()
+        while not self._stopping.is_set():
+            job = self._claim()
+            if job is None:
+                if time.monotonic() - last_recover > 60:
+                    self._recover()
+                    last_recover = time.monotonic()
+                if time.monotonic() - last_purge > 600:
+                    self._purge()
+                    last_purge = time.monotonic()
+                with self._changed:
+                    self._changed.wait(timeout=0.5)
+                continue
+
+            job_id, payload = job
+            try:
+                result = self.handler(payload)
+            except PermanentJobError as e:
+                self._finish(job_id, error=str(e)[:500], retry=False)
+            except Exception as e:
+                self._finish(job_id, error=str(e)[:500])
+            else:
+                self._finish(job_id, result=result)
+
+    def stop(self):
+        """Stop the workers after their current job."""
+        self._stopping.set()
+        with self._changed:
+            self._changed.notify_all()
+        for worker in self._workers:
+            worker.join()
+
+    def metrics(self):
+        """
+        Queue depth and wait times.
+
+        Returns:
+            dict: job counts per status, age of the oldest queued job and
+            percentiles of queue wait (runnable to started) in ms
+        """
+        now = time.time()
+        with self._db_lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            oldest = self._conn.execute(
+                "SELECT MIN(created_at) FROM jobs WHERE status = ?", (QUEUED,)
+            ).fetchone()[0]
+        waits = list(self._waits)
+        return {
+            "queued": counts.get(QUEUED, 0),
+            "running": counts.get(RUNNING, 0),
+            "done": counts.get(DONE, 0),
+            "failed": counts.get(FAILED, 0),
+            "oldest_queued_seconds": now - oldest if oldest is not None else 0.0,
+            "wait_ms_p50": percentile(waits, 50) * 1000,
+            "wait_ms_p95": percentile(waits, 95) * 1000,
+        }
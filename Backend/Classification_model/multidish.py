@@ -0,0 +1,235 @@
+"""
+Multi-dish detection for plate photos holding several foods.
+Cuts the photo into candidate crops (a grid of tiles plus regions around the
+most salient spots), classifies every crop in one batched predict call and
+merges the results into a deduplicated list of foods with summed nutrition.
+
+Try it from the project root:
+    python -m Backend.Classification_model.multidish path/to/plate.jpg
+"""
+
+from PIL import Image, ImageOps
+import argparse
+import io
+import os
+import time
+
+import numpy as np
+
+from Backend.Classification_model.nutrition import lookup_nutrition, sum_nutrition
+
+# Crop generation settings
+MULTI_DISH_GRID = int(os.getenv("MULTI_DISH_GRID", "2"))
+MULTI_DISH_SALIENT_REGIONS = int(os.getenv("MULTI_DISH_SALIENT_REGIONS", "3"))
+MULTI_DISH_MAX_CROPS = int(os.getenv("MULTI_DISH_MAX_CROPS", "8"))
+MULTI_DISH_CROP_SIDE = int(os.getenv("MULTI_DISH_CROP_SIDE", "256"))
+# Crops whose top confidence is below this are ignored
+MULTI_DISH_MIN_CONFIDENCE = float(os.getenv("MULTI_DISH_MIN_CONFIDENCE", "0.5"))
+
+# Saliency is computed on a small copy of the photo
+_SALIENCY_SIDE = 64
+
+
+def _box_blur(values, radius):
+    """Mean filter over a (2 * radius + 1) square window using summed-area tables."""
+    padded = np.pad(values, radius + 1, mode="edge")
+    table = padded.cumsum(axis=0).cumsum(axis=1)
+    size = 2 * radius + 1
+    h, w = values.shape
+    total = (
+        table[size:size + h, size:size + w]
+        - table[:h, size:size + w]
+        - table[size:size + h, :w]
+        + table[:h, :w]
+    )
+    return total / (size * size)
+
+
+def saliency_map(image):
+    """
+    Color-contrast saliency: how far each pixel's smoothed color is from the
+    photo's mean color. Foods stand out from plates and tables this way.
+
+    Args:
+        image (PIL.Image.Image): RGB image
+
+    Returns:
+        np.ndarray: (_SALIENCY_SIDE, _SALIENCY_SIDE) float map scaled to 0-1
+    """
+    small = np.asarray(image.resize((_SALIENCY_SIDE, _SALIENCY_SIDE), Image.BILINEAR), dtype=np.float32)
+    blurred = np.stack([_box_blur(small[:, :, c], 2) for c in range(3)], axis=2)
+    contrast = np.linalg.norm(blurred - blurred.reshape(-1, 3).mean(axis=0), axis=2)
+    peak = contrast.max()
+    return contrast / peak if peak > 0 else contrast
+
+
+def grid_boxes(width, height, grid):
+    """(left, top, right, bottom) boxes tiling the image in a grid x grid layout."""
+    xs = np.linspace(0, width, grid + 1).astype(int)
+    ys = np.linspace(0, height, grid + 1).astype(int)
+    return [(int(xs[i]), int(ys[j]), int(xs[i + 1]), int(ys[j + 1])) for j in range(grid) for i in range(grid)]
+
+
+def salient_boxes(image, count, crop_fraction=0.5):
+    """
+    Square boxes centered on the most salient spots, suppressing each chosen
+    area so the next box lands on a different food.
+
+    Args:
+        image (PIL.Image.Image): RGB image
+        count (int): Max boxes returned
+        crop_fraction (float): Box side as a fraction of the shorter image side
+
+    Returns:
+        list: (left, top, right, bottom) boxes in image pixels
+    """
+    width, height = image.size
+    saliency = saliency_map(image)
+    side = int(min(width, height) * crop_fraction)
+    # Suppression radius in saliency-map cells
+    radius_x = max(1, int(_SALIENCY_SIDE * side / width / 2))
+    radius_y = max(1, int(_SALIENCY_SIDE * side / height / 2))
+
+    boxes = []
+    for _ in range(count):
+        row, col = np.unravel_index(np.argmax(saliency), saliency.shape)
+        if saliency[row, col] <= 0:
+            break
+        saliency[max(0, row - radius_y):row + radius_y + 1, max(0, col - radius_x):col + radius_x + 1] = 0
+
+        center_x = (col + 0.5) * width / _SALIENCY_SIDE
+        center_y = (row + 0.5) * height / _SALIENCY_SIDE
+        left = int(min(max(center_x - side / 2, 0), width - side))
+        top = int(min(max(center_y - side / 2, 0), height - side))
+        boxes.append((left, top, left + side, top + side))
+    return boxes
+
+
+def generate_crops(image_bytes, grid=None, salient_regions=None, max_crops=None, crop_side=None):
+    """
+    Cut a photo into JPEG crops ready for prediction.
+
+    Args:
+        image_bytes (bytes): Raw image file contents
+        grid (int): Tiles per side of the grid (default MULTI_DISH_GRID)
+        salient_regions (int): Saliency-based crops (default MULTI_DISH_SALIENT_REGIONS)
+        max_crops (int): Cap on crops returned, salient ones first (default MULTI_DISH_MAX_CROPS)
+        crop_side (int): Longest side of each encoded crop (default MULTI_DISH_CROP_SIDE)
+
+    Returns:
+        list: (box, jpeg_bytes) pairs
+    """
+    grid = grid or MULTI_DISH_GRID
+    salient_regions = MULTI_DISH_SALIENT_REGIONS if salient_regions is None else salient_regions
+    max_crops = max_crops or MULTI_DISH_MAX_CROPS
+    crop_side = crop_side or MULTI_DISH_CROP_SIDE
+
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        # Work on a bounded copy; crops are downscaled to crop_side anyway
+        image.thumbnail((crop_side * grid, crop_side * grid), Image.BILINEAR)
+
+        boxes = salient_boxes(image, salient_regions) + grid_boxes(*image.size, grid)
+        crops = []
+        for box in boxes[:max_crops]:
+            crop = image.crop(box)
+            crop.thumbnail((crop_side, crop_side), Image.BILINEAR)
+            output = io.BytesIO()
+            crop.save(output, format="JPEG", quality=85)
+            crops.append((box, output.getvalue()))
+    return crops
+
+
+def merge_crop_predictions(predictions, min_confidence=None):
+    """
+    Collapse per-crop predictions into one entry per food.
+
+    Args:
+        predictions (list): Vertex-style prediction per crop (None for failures)
+        min_confidence (float): Ignore crops less confident than this
+
+    Returns:
+        list: {"label", "confidence", "crops"} dicts, most confident first
+    """
+    min_confidence = MULTI_DISH_MIN_CONFIDENCE if min_confidence is None else min_confidence
+    foods = {}
+    for prediction in predictions:
+        if not prediction:
+            continue
+        labels = prediction.get("displayNames") or []
+        scores = prediction.get("confidences") or []
+        if not labels or not scores:
+            continue
+        top_idx = scores.index(max(scores))
+        if scores[top_idx] < min_confidence:
+            continue
+        food = foods.setdefault(labels[top_idx], {"label": labels[top_idx], "confidence": 0.0, "crops": 0})
+        food["confidence"] = max(food["confidence"], scores[top_idx])
+        food["crops"] += 1
+    return sorted(foods.values(), key=lambda food: food["confidence"], reverse=True)
+
+
+def detect_dishes(image_bytes, df_nutrients=None, max_crops=None, min_confidence=None):
+    """
+    Recognize every food on a plate photo.
+
+    Args:
+        image_bytes (bytes): Raw image file contents
+        df_nutrients (pd.DataFrame): Nutrient database for per-item and total nutrition
+        max_crops (int): Cap on crops classified; bounds the extra latency
+        min_confidence (float): Ignore crops less confident than this
+
+    Returns:
+        dict: "foods" (label, confidence, crops and nutrition per food),
+        "total_nutrition", "crops" classified and "latency_ms" per stage
+    """
+    from Backend.Classification_model.predictor import predict_images
+
+    start = time.perf_counter()
+    crops = generate_crops(image_bytes, max_crops=max_crops)
+    cropped = time.perf_counter()
+
+    # Crops are already small JPEGs: no preprocessing, and they share one request
+    result = predict_images([jpeg for _, jpeg in crops], use_cache=False, preprocess=False, priority="interactive")
+    predicted = time.perf_counter()
+
+    foods = merge_crop_predictions(result["predictions"], min_confidence)
+    for food in foods:
+        food["nutrition"] = lookup_nutrition(df_nutrients, food["label"])
+    total = sum_nutrition([food["nutrition"] for food in foods if food["nutrition"]])
+    done = time.perf_counter()
+
+    latency = {
+        "crop_ms": (cropped - start) * 1000,
+        "predict_ms": (predicted - cropped) * 1000,
+        "merge_ms": (done - predicted) * 1000,
+        "total_ms": (done - start) * 1000,
+    }
+    print(f"🍱 {len(foods)} foods in {len(crops)} crops ({latency['total_ms']:.0f} ms, "
+          f"{len(result['failed'])} failed crops)")
+    return {"foods": foods, "total_nutrition": total, "crops": len(crops), "latency_ms": latency}
+
+
+def main():
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Detect several foods in one photo.")
+    parser.add_argument("image")
+    parser.add_argument("--max-crops", type=int, default=None)
+    parser.add_argument("--nutrients", default="Datasets/Nutrient_Database.csv")
+    args = parser.parse_args()
+
+    with open(args.image, "rb") as f:
+        image = f.read()
+    df_nutrients = pd.read_csv(args.nutrients, encoding="utf-8-sig") if os.path.exists(args.nutrients) else None
+
+    result = detect_dishes(image, df_nutrients, max_crops=args.max_crops)
+    for food in result["foods"]:
+        calories = food["nutrition"]["Calories"] if food["nutrition"] else "?"
+        print(f"  {food['label']:<24} {food['confidence'] * 100:5.1f}%  {calories} kcal  ({food['crops']} crops)")
+    print(f"Total: {result['total_nutrition']['Calories']:.0f} kcal")
+    print("Latency: " + ", ".join(f"{stage} {ms:.0f}" for stage, ms in result["latency_ms"].items()))
+
+
+if __name__ == "__main__":
+    main()
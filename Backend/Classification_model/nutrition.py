@@ -0,0 +1,159 @@
+"""
+Nutrient database helpers shared by the prediction features.
+Reads the Food-101 class names from Datasets/Nutrient_Database.csv, matches
+model labels (e.g. "apple_pie") to its rows, adds up nutrition for meals
+with several foods, and computes confidence-weighted expected nutrition over
+a whole prediction.
+"""
+
+import csv
+import threading
+
+import numpy as np
+import pandas as pd
+
+NUTRIENT_DATABASE_PATH = "Datasets/Nutrient_Database.csv"
+NUTRIENT_COLUMNS = ["Calories", "Protein", "Fat", "Carbs", "Fiber", "Sugar"]
+
+
+def load_food_labels(path=NUTRIENT_DATABASE_PATH):
+    """Food-101 class names, taken from the nutrient database (in Food-101 index order)."""
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        return [row["Food Class"] for row in csv.DictReader(f)]
+
+
+def normalize_food_name(name):
+    """Lowercase, underscores to spaces, trimmed ("Apple_Pie " -> "apple pie")."""
+    return str(name).lower().replace("_", " ").strip()
+
+
+def lookup_nutrition(df_nutrients, food_name):
+    """
+    Find the nutrient row for a predicted food, using the same partial and
+    reversed-word matching as the upload page.
+
+    Args:
+        df_nutrients (pd.DataFrame): Nutrient database
+        food_name (str): Model label or display name
+
+    Returns:
+        dict: The matching row, or None if nothing matches
+    """
+    if df_nutrients is None or df_nutrients.empty:
+        return None
+
+    classes = df_nutrients["Food Class"].map(normalize_food_name)
+    food_name_clean = normalize_food_name(food_name)
+
+    match = df_nutrients[classes.str.contains(food_name_clean, na=False, regex=False)]
+    if match.empty:
+        # Try reversed order (e.g., "chicken grilled" -> "grilled chicken")
+        reversed_name = " ".join(reversed(food_name_clean.split()))
+        match = df_nutrients[classes.str.contains(reversed_name, na=False, regex=False)]
+
+    if match.empty:
+        return None
+    return match.iloc[0].to_dict()
+
+
+def sum_nutrition(rows):
+    """Add up the nutrient columns of several database rows."""
+    totals = {column: 0.0 for column in NUTRIENT_COLUMNS}
+    for row in rows:
+        for column in NUTRIENT_COLUMNS:
+            try:
+                totals[column] += float(row.get(column) or 0)
+            except (TypeError, ValueError):
+                pass
+    return totals
+
+
+class NutrientMatrix:
+    """
+    The nutrient database as a (foods x nutrients) NumPy matrix, for
+    confidence-weighted nutrition over every label of a prediction.
+
+    The matrix is stored next to its element-wise square, so the weighted
+    mean and second moment (hence the spread) of every nutrient come out of
+    a single vector-matrix product.
+
+    Args:
+        df_nutrients (pd.DataFrame): Nutrient database
+    """
+
+    def __init__(self, df_nutrients):
+        self.df_nutrients = df_nutrients
+        values = df_nutrients[NUTRIENT_COLUMNS].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+        values = np.nan_to_num(values)
+        self._moments = np.hstack([values, values ** 2])
+        self._rows = {}
+        for row, name in enumerate(df_nutrients["Food Class"].map(normalize_food_name)):
+            self._rows.setdefault(name, row)
+        # Label -> row index (-1 when the database has no match), filled lazily
+        self._label_rows = {}
+        self._lock = threading.Lock()
+
+    def _row_for(self, label):
+        name = normalize_food_name(label)
+        row = self._rows.get(name)
+        if row is None:
+            # Same partial / reversed-word matching as lookup_nutrition
+            for candidate in (name, " ".join(reversed(name.split()))):
+                row = next((r for key, r in self._rows.items() if candidate in key), None)
+                if row is not None:
+                    break
+        return -1 if row is None else row
+
+    def align(self, labels):
+        """
+        Row index of each label in the matrix.
+
+        Returns:
+            np.ndarray: One row index per label, -1 where nothing matches
+        """
+        with self._lock:
+            for label in labels:
+                if label not in self._label_rows:
+                    self._label_rows[label] = self._row_for(label)
+            return np.fromiter((self._label_rows[label] for label in labels), dtype=np.int64, count=len(labels))
+
+    def expected(self, prediction):
+        """
+        Confidence-weighted nutrition of a Vertex-style prediction.
+
+        Confidences of labels found in the database are renormalized to sum
+        to 1, so the result is the expected value per portion if the true
+        food is one of them. Predictions are usually cut to the top-k labels
+        (PREDICT_TOP_K), so the spread only covers those labels; "coverage"
+        says how much of the model's confidence that is.
+
+        Args:
+            prediction (dict): {"displayNames": [...], "confidences": [...]}
+
+        Returns:
+            dict: "expected", "std", "low" and "high" (expected +/- one standard
+            deviation, never below 0) per nutrient column, plus "coverage": the
+            share of the model's total confidence (1.0 across all classes) held
+            by labels that matched a database row. None when no label matched.
+        """
+        labels = prediction.get("displayNames") or []
+        confidences = np.asarray(prediction.get("confidences") or [], dtype=np.float64)
+        rows = self.align(labels)
+        matched = rows >= 0
+        weights = confidences[matched]
+        total = weights.sum()
+        if total <= 0:
+            return None
+
+        moments = (weights / total) @ self._moments[rows[matched]]
+        count = len(NUTRIENT_COLUMNS)
+        mean, second = moments[:count], moments[count:]
+        std = np.sqrt(np.maximum(second - mean ** 2, 0.0))
+        return {
+            "expected": dict(zip(NUTRIENT_COLUMNS, mean.tolist())),
+            "std": dict(zip(NUTRIENT_COLUMNS, std.tolist())),
+            "low": dict(zip(NUTRIENT_COLUMNS, np.maximum(mean - std, 0.0).tolist())),
+            "high": dict(zip(NUTRIENT_COLUMNS, (mean + std).tolist())),
+            # Dropped labels are missing from the sum, so it is below 1 after top-k
+            "coverage": float(total / max(confidences.sum(), 1.0)),
+        }
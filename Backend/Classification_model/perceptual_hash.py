@@ -0,0 +1,170 @@
+"""
+Perceptual-hash index for near-duplicate meal photos.
+Re-taken photos of the same plate rarely share exact bytes, but their 64-bit
+difference hashes (dHash) stay within a few bits of each other. The index
+keeps recent hashes in a packed uint64 array so a lookup is one vectorized
+XOR + popcount over every entry.
+
+Both hashes only see brightness, so two flat photos of different colors
+(a red and a blue plate) hash identically. Each entry also stores the photo's
+mean RGB color, and a match must be close in both.
+"""
+
+from PIL import Image
+import numpy as np
+import io
+import threading
+
+HASH_SIZE = 8
+
+# Bits set in each byte value, for NumPy builds without np.bitwise_count
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _load_small(image_bytes, width, height):
+    """Decode an image straight to a tiny RGB thumbnail."""
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        # Let the JPEG decoder downscale while decoding (much cheaper than full decode)
+        image.draft("RGB", (width * 8, height * 8))
+        return image.convert("RGB").resize((width, height), Image.BILINEAR)
+
+
+def _grayscale(small):
+    return np.asarray(small.convert("L"), dtype=np.int16)
+
+
+def _mean_color(small):
+    return np.asarray(small, dtype=np.float32).reshape(-1, 3).mean(axis=0)
+
+
+def _pack_bits(bits):
+    """Pack a boolean array of 64 bits into one unsigned 64-bit integer."""
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def _dhash_bits(small):
+    pixels = _grayscale(small)
+    return _pack_bits(pixels[:, 1:] > pixels[:, :-1])
+
+
+def _ahash_bits(small):
+    pixels = _grayscale(small)
+    return _pack_bits(pixels > pixels.mean())
+
+
+def dhash(image_bytes):
+    """Difference hash: compares horizontally adjacent pixels of a 9x8 thumbnail."""
+    return _dhash_bits(_load_small(image_bytes, HASH_SIZE + 1, HASH_SIZE))
+
+
+def dhash_image(image):
+    """dHash of an already decoded PIL image, e.g. a video frame."""
+    return _dhash_bits(image.convert("L").resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR))
+
+
+def ahash(image_bytes):
+    """Average hash: compares each pixel of an 8x8 thumbnail to the mean."""
+    return _ahash_bits(_load_small(image_bytes, HASH_SIZE, HASH_SIZE))
+
+
+def _popcount(values):
+    """Number of set bits in each element of a uint64 array."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    return _POPCOUNT_TABLE[values.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+HASH_FUNCTIONS = {"dhash": dhash, "ahash": ahash}
+
+# Thumbnail size and bit function per method, for fingerprints taken from one decode
+_HASH_METHODS = {
+    "dhash": ((HASH_SIZE + 1, HASH_SIZE), _dhash_bits),
+    "ahash": ((HASH_SIZE, HASH_SIZE), _ahash_bits),
+}
+
+
+class NearDuplicateIndex:
+    """
+    Bounded ring buffer of (perceptual hash, mean color, prediction) entries.
+
+    Args:
+        max_entries (int): Max hashes kept; the oldest is overwritten first
+        max_distance (int): Max Hamming distance (in bits) counted as a match
+        method (str): "dhash" or "ahash"
+        max_color_distance (float): Max difference of any mean RGB channel (0-255)
+            counted as a match
+    """
+
+    def __init__(self, max_entries=10000, max_distance=5, method="dhash", max_color_distance=16.0):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.max_color_distance = max_color_distance
+        self._thumbnail_size, self._hash_bits = _HASH_METHODS[method]
+        self._hashes = np.zeros(max_entries, dtype=np.uint64)
+        self._colors = np.zeros((max_entries, 3), dtype=np.float32)
+        self._predictions = [None] * max_entries
+        self._count = 0
+        self._next = 0
+        self._endpoint_key = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def _check_endpoint(self, endpoint_key):
+        """Forget every entry when the endpoint changes (caller holds the lock)."""
+        if endpoint_key != self._endpoint_key:
+            self._predictions = [None] * self.max_entries
+            self._count = 0
+            self._next = 0
+            self._endpoint_key = endpoint_key
+
+    def fingerprint(self, image_bytes):
+        """
+        Hash and mean color of an image, from a single small decode.
+
+        Returns:
+            tuple: (hash, mean RGB array)
+        """
+        small = _load_small(image_bytes, *self._thumbnail_size)
+        return self._hash_bits(small), _mean_color(small)
+
+    def lookup(self, fingerprint, endpoint_key):
+        """
+        Find the closest stored prediction within max_distance bits and
+        max_color_distance per color channel.
+
+        Returns:
+            tuple: (prediction, distance), or (None, None) when nothing is close enough
+        """
+        image_hash, color = fingerprint
+        with self._lock:
+            self._check_endpoint(endpoint_key)
+            if self._count:
+                distances = _popcount(self._hashes[:self._count] ^ np.uint64(image_hash)).astype(np.int64)
+                color_ok = np.abs(self._colors[:self._count] - color).max(axis=1) <= self.max_color_distance
+                # Entries of another color can never win
+                distances[~color_ok] = HASH_SIZE * HASH_SIZE + 1
+                best = int(np.argmin(distances))
+                distance = int(distances[best])
+                if distance <= self.max_distance:
+                    self.hits += 1
+                    return self._predictions[best], distance
+            self.misses += 1
+            return None, None
+
+    def add(self, fingerprint, endpoint_key, prediction):
+        """Store a prediction, overwriting the oldest entry when full."""
+        image_hash, color = fingerprint
+        with self._lock:
+            self._check_endpoint(endpoint_key)
+            self._hashes[self._next] = np.uint64(image_hash)
+            self._colors[self._next] = color
+            self._predictions[self._next] = prediction
+            self._next = (self._next + 1) % self.max_entries
+            self._count = min(self._count + 1, self.max_entries)
+
+    def stats(self):
+        """Hit/miss counters and current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": self._count}
@@ -1,16 +1,31 @@
 """
 Vertex AI Prediction Client
-Handles image classification requests to Vertex AI endpoint.
+Handles image classification requests to Vertex AI endpoint
+(or the local CPU backend when PREDICTOR_BACKEND=local).
+
+The Vertex AI SDK, credentials and endpoint handle are created lazily on the
+first prediction (or by warm_up_endpoint) and shared by every session in the
+process, so importing this module stays cheap.
 """
 
-from google.cloud import aiplatform
-from google.oauth2 import service_account
 import streamlit as st
 from dotenv import load_dotenv
-import base64
+import threading
+import time
 import os
 import json
 
+# cache, perceptual_hash, backends, cascade, preprocessing and validation (and
+# through them numpy, PIL and sqlite3) are imported on first use
+from Backend.Classification_model.resilience import CircuitBreaker, call_with_resilience
+from Backend.Classification_model.singleflight import SingleFlight
+from Backend.Classification_model.batcher import MicroBatcher
+from Backend.Classification_model.router import EndpointRouter
+from Backend.Classification_model.shadow import ShadowTraffic
+from Backend.Classification_model.speculative import SpeculativePredictor
+from Backend.Classification_model.jobs import JobQueue, PermanentJobError
+from Backend.Classification_model.admission import AdmissionController
+
 # Load .env variables
 load_dotenv()
 
@@ -19,53 +34,772 @@ PROJECT_ID = os.getenv("PROJECT_ID")
 REGION = os.getenv("REGION")
 ENDPOINT_ID = os.getenv("ENDPOINT_ID")
 
-# Authenticate once globally
-# credentials = service_account.Credentials.from_service_account_file(SERVICE_ACCOUNT_PATH)
-# aiplatform.init(project=PROJECT_ID, location=REGION, credentials=credentials)
+# Optional multi-region deployment: "region/endpoint_id,region/endpoint_id,..."
+VERTEX_ENDPOINTS = os.getenv("VERTEX_ENDPOINTS")
+_vertex_settings = None
 
-if os.getenv("GOOGLE_APPLICATION_CREDENTIALS") and os.path.exists(os.getenv("GOOGLE_APPLICATION_CREDENTIALS")):
-    credentials = service_account.Credentials.from_service_account_file(
-        os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-    )
-    project_id = os.getenv("PROJECT_ID")
-    region = os.getenv("REGION")
-    endpoint_id = os.getenv("ENDPOINT_ID")
-else:
-    # Fallback for Streamlit Cloud
-    credentials = service_account.Credentials.from_service_account_info(st.secrets["vertex"])
-    project_id = st.secrets["vertex"]["project_id"]
-    region = st.secrets["vertex"]["REGION"]
-    endpoint_id = st.secrets["vertex"]["ENDPOINT_ID"]
-
-# Initialize Vertex AI client
-aiplatform.init(project=project_id, location=region, credentials=credentials)
-
-# Create endpoint reference
-endpoint = aiplatform.Endpoint(
-    endpoint_name=f"projects/{project_id}/locations/{region}/endpoints/{endpoint_id}"
+# Optional REST ":predict" URL(s), comma-separated (e.g. local fake endpoints),
+# used instead of the Vertex AI SDK
+VERTEX_ENDPOINT_URL = os.getenv("VERTEX_ENDPOINT_URL")
+
+# How Vertex AI is called: "sdk" (aiplatform.Endpoint) or "grpc" (persistent
+# PredictionServiceClient channel with keepalive, see grpc_endpoint.py)
+PREDICT_TRANSPORT = os.getenv("PREDICT_TRANSPORT", "sdk").lower()
+GRPC_KEEPALIVE_SECONDS = float(os.getenv("GRPC_KEEPALIVE_SECONDS", "30"))
+# Open the gRPC connection and fetch a token during warm_up_endpoint()
+GRPC_WARMUP = os.getenv("GRPC_WARMUP", "true").lower() == "true"
+
+# Routing across several endpoints: EWMA weight and error rate that marks one unhealthy
+ROUTER_EWMA_ALPHA = float(os.getenv("ROUTER_EWMA_ALPHA", "0.2"))
+ROUTER_MAX_ERROR_RATE = float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.5"))
+ROUTER_PROBE_SECONDS = float(os.getenv("ROUTER_PROBE_SECONDS", "30"))
+
+# Batch limits for predict_images (Vertex AI caps online requests at 1.5 MB)
+MAX_BATCH_SIZE = int(os.getenv("PREDICT_MAX_BATCH_SIZE", "16"))
+MAX_PAYLOAD_BYTES = int(os.getenv("PREDICT_MAX_PAYLOAD_BYTES", "1500000"))
+
+# Approximate JSON overhead per instance: {"content": "..."},
+_INSTANCE_OVERHEAD_BYTES = 16
+
+# HTTP status codes that mean "this request was rejected", worth splitting
+_SPLITTABLE_ERROR_CODES = (400, 413)
+
+# Shared prediction cache, built by get_prediction_cache()
+# (set PREDICTION_CACHE_DB to persist across restarts)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "256"))
+PREDICTION_CACHE_DB = os.getenv("PREDICTION_CACHE_DB")
+PREDICTION_CACHE_DB_MAX_ROWS = int(os.getenv("PREDICTION_CACHE_DB_MAX_ROWS", "100000"))
+_prediction_cache = None
+
+# Opt-in near-duplicate photo lookup, consulted after an exact cache miss.
+# A match reuses another photo's prediction, so it is off unless enabled.
+NEAR_DUPLICATE_LOOKUP = os.getenv("NEAR_DUPLICATE_LOOKUP", "false").lower() == "true"
+_near_duplicate_index = None
+
+# Only the top-k classes are requested and kept (smaller responses and session state)
+PREDICT_TOP_K = int(os.getenv("PREDICT_TOP_K", "5"))
+PREDICT_CONFIDENCE_THRESHOLD = float(os.getenv("PREDICT_CONFIDENCE_THRESHOLD", "0.0"))
+PREDICTION_PARAMETERS = {
+    "maxPredictions": PREDICT_TOP_K,
+    "confidenceThreshold": PREDICT_CONFIDENCE_THRESHOLD,
+}
+
+# Opt-in thumbnail-first cascade: full resolution only for low-confidence thumbnails
+USE_CASCADE = os.getenv("PREDICT_CASCADE", "false").lower() == "true"
+_prediction_cascade = None
+_shared_lock = threading.Lock()
+
+# Deadline, retry and circuit breaker settings for endpoint calls
+PREDICT_DEADLINE_SECONDS = float(os.getenv("PREDICT_DEADLINE_SECONDS", "20"))
+PREDICT_MAX_ATTEMPTS = int(os.getenv("PREDICT_MAX_ATTEMPTS", "3"))
+circuit_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("CIRCUIT_RESET_SECONDS", "30")),
 )
 
+# Coalesces identical predictions that are in flight at the same time
+in_flight_predictions = SingleFlight()
+
+# Opt-in cross-session micro-batching of single-image predictions
+USE_MICRO_BATCHING = os.getenv("USE_MICRO_BATCHING", "false").lower() == "true"
+MICRO_BATCH_WAIT_MS = float(os.getenv("MICRO_BATCH_WAIT_MS", "5"))
+_micro_batcher = None
+_micro_batcher_lock = threading.Lock()
+
+# Which backend serves predictions: "vertex" (default) or "local" (CPU model).
+# See the backends module docstring for how to export the local model.
+PREDICTOR_BACKEND = os.getenv("PREDICTOR_BACKEND", "vertex").lower()
+LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH", "Backend/Classification_model/food101.onnx")
+_backends = {}
+_backends_lock = threading.Lock()
+
+# Opt-in shadow traffic to a candidate endpoint (same project/region, or a REST URL)
+SHADOW_ENDPOINT_ID = os.getenv("SHADOW_ENDPOINT_ID")
+SHADOW_ENDPOINT_URL = os.getenv("SHADOW_ENDPOINT_URL")
+SHADOW_SAMPLE_RATE = float(os.getenv("SHADOW_SAMPLE_RATE", "0.05"))
+SHADOW_METRICS_DB = os.getenv("SHADOW_METRICS_DB", "shadow_metrics.db")
+_shadow_traffic = None
+_shadow_lock = threading.Lock()
+
+# Opt-in speculative prediction as soon as a photo is uploaded
+SPECULATIVE_PREDICTION = os.getenv("SPECULATIVE_PREDICTION", "false").lower() == "true"
+_speculative_predictor = None
+_speculative_lock = threading.Lock()
+
+# Opt-in persistent job queue: the upload page enqueues and polls instead of predicting inline
+USE_JOB_QUEUE = os.getenv("USE_JOB_QUEUE", "false").lower() == "true"
+JOB_QUEUE_DB = os.getenv("JOB_QUEUE_DB", "prediction_jobs.db")
+JOB_QUEUE_WORKERS = int(os.getenv("JOB_QUEUE_WORKERS", "4"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+# Running jobs older than this are assumed abandoned by a stopped process
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "300"))
+_job_queue = None
+_job_queue_lock = threading.Lock()
+
+# Opt-in admission control: bounded concurrency, interactive before bulk work,
+# and shedding to the local backend (when its model exists) once a request
+# waited longer than its priority's budget
+USE_ADMISSION_CONTROL = os.getenv("USE_ADMISSION_CONTROL", "false").lower() == "true"
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "8"))
+ADMISSION_INTERACTIVE_BUDGET = float(os.getenv("ADMISSION_INTERACTIVE_BUDGET", "2"))
+ADMISSION_BULK_BUDGET = float(os.getenv("ADMISSION_BULK_BUDGET", "30"))
+_admission_controller = None
+_admission_lock = threading.Lock()
+
+# Process-wide endpoint handle, built on first use
+_endpoint = None
+_endpoint_lock = threading.Lock()
+
+
+def parse_endpoint_list(value):
+    """
+    Parse VERTEX_ENDPOINTS ("region/endpoint_id,region/endpoint_id,...").
+
+    Returns:
+        list: (region, endpoint_id) pairs
+
+    Raises:
+        ValueError: If an entry is empty or not of the form region/endpoint_id
+    """
+    endpoints = []
+    for item in value.split(","):
+        region, _, endpoint_id = item.strip().partition("/")
+        if not region or not endpoint_id or "/" in endpoint_id:
+            raise ValueError(
+                f"Invalid VERTEX_ENDPOINTS entry {item.strip()!r} in {value!r}: "
+                "expected comma-separated region/endpoint_id pairs, e.g. us-central1/1234,europe-west4/5678"
+            )
+        endpoints.append((region, endpoint_id))
+    return endpoints
+
+
+def get_vertex_settings():
+    """
+    Resolve project, region and endpoint ID from .env or Streamlit secrets.
+    The result is computed (and VERTEX_ENDPOINTS validated) once per process.
+
+    Returns:
+        dict: project_id, region, endpoint_id and "endpoints", a list of
+        (region, endpoint_id) pairs (no network calls are made)
+    """
+    global _vertex_settings
+
+    if _vertex_settings is None:
+        _vertex_settings = _load_vertex_settings()
+    return _vertex_settings
+
+
+def _load_vertex_settings():
+    if SERVICE_ACCOUNT_PATH and os.path.exists(SERVICE_ACCOUNT_PATH):
+        settings = {"project_id": PROJECT_ID, "region": REGION, "endpoint_id": ENDPOINT_ID}
+        endpoints = VERTEX_ENDPOINTS
+    else:
+        # Fallback for Streamlit Cloud
+        settings = {
+            "project_id": st.secrets["vertex"]["project_id"],
+            "region": st.secrets["vertex"]["REGION"],
+            "endpoint_id": st.secrets["vertex"]["ENDPOINT_ID"],
+        }
+        endpoints = st.secrets["vertex"].get("ENDPOINTS", VERTEX_ENDPOINTS)
+
+    if endpoints:
+        settings["endpoints"] = parse_endpoint_list(endpoints)
+    else:
+        settings["endpoints"] = [(settings["region"], settings["endpoint_id"])]
+    return settings
+
+
+def get_endpoint_names():
+    """Resource names (or REST URLs) of every configured endpoint."""
+    if VERTEX_ENDPOINT_URL:
+        return [url.strip() for url in VERTEX_ENDPOINT_URL.split(",")]
+    settings = get_vertex_settings()
+    return [
+        f"projects/{settings['project_id']}/locations/{region}/endpoints/{endpoint_id}"
+        for region, endpoint_id in settings["endpoints"]
+    ]
+
+
+def get_endpoint_name():
+    """Name of the configured endpoint(s), also used as the cache namespace."""
+    return ",".join(get_endpoint_names())
+
+
+def _load_credentials():
+    """Load service account credentials from the key file or Streamlit secrets."""
+    from google.oauth2 import service_account
+
+    if SERVICE_ACCOUNT_PATH and os.path.exists(SERVICE_ACCOUNT_PATH):
+        return service_account.Credentials.from_service_account_file(SERVICE_ACCOUNT_PATH)
+    return service_account.Credentials.from_service_account_info(st.secrets["vertex"])
+
+
+def get_endpoint():
+    """
+    Return the shared Vertex AI endpoint, initializing the client on first call.
+    With several endpoints configured this is an EndpointRouter that sends
+    each request to the fastest healthy one.
+    """
+    global _endpoint
+
+    if _endpoint is None:
+        with _endpoint_lock:
+            if _endpoint is None:
+                names = get_endpoint_names()
+                if VERTEX_ENDPOINT_URL:
+                    from Backend.Classification_model.http_endpoint import HttpEndpoint
+
+                    endpoints = [HttpEndpoint(name) for name in names]
+                elif PREDICT_TRANSPORT == "grpc":
+                    from Backend.Classification_model.grpc_endpoint import GrpcEndpoint
 
-def predict_image_classification(image_path: str):
+                    credentials = _load_credentials()
+                    endpoints = [
+                        GrpcEndpoint(
+                            name,
+                            f"{region}-aiplatform.googleapis.com",
+                            credentials=credentials,
+                            keepalive_seconds=GRPC_KEEPALIVE_SECONDS,
+                        )
+                        for name, (region, _) in zip(names, get_vertex_settings()["endpoints"])
+                    ]
+                else:
+                    # Heavy import kept out of module import time
+                    from google.cloud import aiplatform
+
+                    settings = get_vertex_settings()
+                    aiplatform.init(
+                        project=settings["project_id"],
+                        location=settings["region"],
+                        credentials=_load_credentials(),
+                    )
+                    endpoints = [aiplatform.Endpoint(endpoint_name=name) for name in names]
+
+                if len(endpoints) == 1:
+                    _endpoint = endpoints[0]
+                else:
+                    _endpoint = EndpointRouter(
+                        list(zip(names, endpoints)),
+                        alpha=ROUTER_EWMA_ALPHA,
+                        max_error_rate=ROUTER_MAX_ERROR_RATE,
+                        probe_after=ROUTER_PROBE_SECONDS,
+                    )
+    return _endpoint
+
+
+def get_endpoint_routing():
+    """Per-endpoint latency/error EWMAs when routing across several endpoints, else []."""
+    if isinstance(_endpoint, EndpointRouter):
+        return _endpoint.snapshot()
+    return []
+
+
+def get_connection_stats():
+    """Connection reuse and first-call vs steady-state latency of gRPC endpoints, else []."""
+    if _endpoint is None:
+        return []
+    routed = _endpoint.endpoints.items() if isinstance(_endpoint, EndpointRouter) else [(None, _endpoint)]
+    return [
+        {"name": name or target.endpoint_name, **target.stats()}
+        for name, target in routed
+        if hasattr(target, "warm_up")
+    ]
+
+
+def warm_up_endpoint():
+    """
+    Build the endpoint handle in a background thread so the first user
+    request does not pay the setup cost. With PREDICT_TRANSPORT=grpc this
+    also opens the channel and fetches an access token (GRPC_WARMUP).
+
+    Returns:
+        threading.Thread: the started warm-up thread
+    """
+    def _warm_up():
+        try:
+            endpoint = get_endpoint()
+            if GRPC_WARMUP:
+                routed = endpoint.endpoints.values() if isinstance(endpoint, EndpointRouter) else [endpoint]
+                for target in routed:
+                    if hasattr(target, "warm_up"):
+                        print(f"🔌 gRPC channel ready in {target.warm_up() * 1000:.0f} ms.")
+            print("✅ Vertex AI endpoint warmed up.")
+        except Exception as e:
+            print(f"⚠️ Vertex AI warm-up failed: {e}")
+
+    thread = threading.Thread(target=_warm_up, name="vertex-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def _build_shadow_endpoint():
+    """Create the candidate endpoint that receives shadow traffic."""
+    if SHADOW_ENDPOINT_URL:
+        from Backend.Classification_model.http_endpoint import HttpEndpoint
+
+        return HttpEndpoint(SHADOW_ENDPOINT_URL)
+
+    from google.cloud import aiplatform
+
+    get_endpoint()  # makes sure aiplatform.init has run
+    settings = get_vertex_settings()
+    return aiplatform.Endpoint(
+        endpoint_name=(
+            f"projects/{settings['project_id']}/locations/{settings['region']}"
+            f"/endpoints/{SHADOW_ENDPOINT_ID}"
+        )
+    )
+
+
+def get_shadow_traffic():
+    """Return the shared ShadowTraffic mirror, or None when no candidate is configured."""
+    global _shadow_traffic
+
+    if not (SHADOW_ENDPOINT_ID or SHADOW_ENDPOINT_URL):
+        return None
+    with _shadow_lock:
+        if _shadow_traffic is None:
+            _shadow_traffic = ShadowTraffic(
+                _build_shadow_endpoint,
+                sample_rate=SHADOW_SAMPLE_RATE,
+                db_path=SHADOW_METRICS_DB,
+                timeout=PREDICT_DEADLINE_SECONDS,
+            )
+    return _shadow_traffic
+
+
+def _call_endpoint(instances):
+    """Send instances to the endpoint under the deadline/retry/circuit breaker policy."""
+    start = time.perf_counter()
+    response = call_with_resilience(
+        lambda timeout: get_endpoint().predict(
+            instances=instances, parameters=PREDICTION_PARAMETERS, timeout=timeout
+        ),
+        breaker=circuit_breaker,
+        deadline=PREDICT_DEADLINE_SECONDS,
+        max_attempts=PREDICT_MAX_ATTEMPTS,
+    )
+
+    # Mirror a sample of requests to the candidate endpoint, off the critical path
+    shadow = get_shadow_traffic()
+    if shadow:
+        shadow.maybe_shadow(instances, PREDICTION_PARAMETERS, response.predictions, time.perf_counter() - start)
+    return response
+
+
+def get_micro_batcher():
+    """Return the shared MicroBatcher that groups requests from all sessions."""
+    global _micro_batcher
+
+    with _micro_batcher_lock:
+        if _micro_batcher is None:
+            _micro_batcher = MicroBatcher(
+                lambda instances: _call_endpoint(instances).predictions,
+                max_batch_size=MAX_BATCH_SIZE,
+                max_wait_ms=MICRO_BATCH_WAIT_MS,
+                # Same request-size budget as the explicit batches in predict_images
+                max_payload_bytes=MAX_PAYLOAD_BYTES,
+                size_fn=lambda instance: len(instance["content"]) + _INSTANCE_OVERHEAD_BYTES,
+            )
+    return _micro_batcher
+
+
+def _send_instances(instances):
+    """Send encoded instances to Vertex AI, via the micro-batcher for single images when enabled."""
+    if USE_MICRO_BATCHING and len(instances) == 1:
+        return [get_micro_batcher().predict(instances[0])]
+    return _call_endpoint(instances).predictions
+
+
+def get_prediction_cache():
+    """Return the shared PredictionCache, opening its SQLite tier on first use."""
+    global _prediction_cache
+
+    if _prediction_cache is None:
+        with _shared_lock:
+            if _prediction_cache is None:
+                from Backend.Classification_model.cache import PredictionCache
+
+                _prediction_cache = PredictionCache(
+                    max_entries=PREDICTION_CACHE_SIZE,
+                    db_path=PREDICTION_CACHE_DB,
+                    max_db_entries=PREDICTION_CACHE_DB_MAX_ROWS,
+                )
+    return _prediction_cache
+
+
+def get_near_duplicate_index():
+    """Return the shared NearDuplicateIndex (numpy and PIL are loaded here)."""
+    global _near_duplicate_index
+
+    if _near_duplicate_index is None:
+        with _shared_lock:
+            if _near_duplicate_index is None:
+                from Backend.Classification_model.perceptual_hash import NearDuplicateIndex
+
+                _near_duplicate_index = NearDuplicateIndex(
+                    max_entries=int(os.getenv("NEAR_DUPLICATE_INDEX_SIZE", "10000")),
+                    max_distance=int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "5")),
+                    method=os.getenv("NEAR_DUPLICATE_HASH", "dhash"),
+                    max_color_distance=float(os.getenv("NEAR_DUPLICATE_MAX_COLOR_DISTANCE", "16")),
+                )
+    return _near_duplicate_index
+
+
+def get_prediction_cascade():
+    """Return the shared thumbnail-first PredictionCascade."""
+    global _prediction_cascade
+
+    if _prediction_cascade is None:
+        with _shared_lock:
+            if _prediction_cascade is None:
+                from Backend.Classification_model.cascade import PredictionCascade
+
+                _prediction_cascade = PredictionCascade(
+                    threshold=float(os.getenv("CASCADE_CONFIDENCE_THRESHOLD", "0.8")),
+                    thumbnail_side=int(os.getenv("CASCADE_THUMBNAIL_SIZE", "160")),
+                    thumbnail_quality=int(os.getenv("CASCADE_THUMBNAIL_QUALITY", "75")),
+                )
+    return _prediction_cascade
+
+
+def get_backend(name=None):
     """
-    Sends an image file to the Vertex AI endpoint and returns predictions.
+    Return the shared prediction backend selected by PREDICTOR_BACKEND.
+
+    Args:
+        name (str): Override the configured backend ("vertex" or "local")
+    """
+    from Backend.Classification_model.backends import VertexBackend, LocalBackend
+
+    name = (name or PREDICTOR_BACKEND).lower()
+    with _backends_lock:
+        if name not in _backends:
+            if name == "vertex":
+                _backends[name] = VertexBackend(_send_instances, get_endpoint_name, top_k=PREDICT_TOP_K)
+            elif name == "local":
+                _backends[name] = LocalBackend(LOCAL_MODEL_PATH, top_k=PREDICT_TOP_K)
+            else:
+                raise ValueError(f"Unknown predictor backend: {name}")
+        return _backends[name]
+
+
+def get_backend_latency():
+    """Latency stats for every backend used so far in this process."""
+    with _backends_lock:
+        backends = list(_backends.values())
+    return [backend.latency_stats() for backend in backends]
+
+
+def get_cascade_stats():
+    """Escalation rate and bytes saved by the thumbnail-first cascade."""
+    return get_prediction_cascade().stats()
+
+
+def get_prediction_health():
+    """
+    Circuit breaker state for the prediction endpoint.
+
+    Returns:
+        dict: "state" ("closed", "open" or "half_open"), consecutive failures
+        and seconds until the next trial call when open
+    """
+    return circuit_breaker.snapshot()
+
+
+def get_admission_controller():
+    """Return the shared AdmissionController, or None when admission control is off."""
+    global _admission_controller
+
+    if not USE_ADMISSION_CONTROL:
+        return None
+    with _admission_lock:
+        if _admission_controller is None:
+            _admission_controller = AdmissionController(
+                max_concurrent=ADMISSION_MAX_CONCURRENT,
+                budgets={"interactive": ADMISSION_INTERACTIVE_BUDGET, "bulk": ADMISSION_BULK_BUDGET},
+            )
+    return _admission_controller
+
+
+def get_admission_stats():
+    """Served/queued/shed counters per priority, or {} when admission control is off."""
+    controller = get_admission_controller()
+    return controller.stats() if controller else {}
+
+
+def _cache_variant(preprocess=True, cascade=False):
+    """
+    Cache variant of a request mode. Only preprocessed full-resolution results
+    are canonical (None); raw uploads and cascade results, which may come from
+    the thumbnail alone, are kept under their own keys.
+    """
+    if not preprocess:
+        return "raw"
+    return "cascade" if cascade else None
+
+
+def _cache_namespace(backend):
+    """
+    Cache namespace for a backend: its model plus every setting that changes
+    the stored result (top-k, confidence threshold, preprocessing).
+    """
+    from Backend.Classification_model.preprocessing import MODEL_INPUT_SIZE, JPEG_QUALITY
+
+    return (
+        f"{backend.cache_namespace}|k={PREDICT_TOP_K}|min={PREDICT_CONFIDENCE_THRESHOLD}"
+        f"|{MODEL_INPUT_SIZE}px|q={JPEG_QUALITY}"
+    )
+
+
+def _admitted(backend, send, priority):
+    """
+    Call send(backend) under admission control.
+
+    Returns:
+        tuple: (result, shed) where shed means the local backend answered instead;
+        such results must not be cached under the primary backend's namespace
+    """
+    controller = get_admission_controller()
+    if controller is None:
+        return send(backend), False
+
+    shed = False
+    fallback = None
+    if backend.name != "local" and os.path.exists(LOCAL_MODEL_PATH):
+        def fallback():
+            nonlocal shed
+            shed = True
+            return send(get_backend("local"))
+
+    result = controller.run(lambda: send(backend), priority, fallback=fallback)
+    return result, shed
+
+
+def _instance_size(image_bytes):
+    """Approximate serialized size of one base64-encoded instance in bytes."""
+    return 4 * ((len(image_bytes) + 2) // 3) + _INSTANCE_OVERHEAD_BYTES
+
+
+def _pack_batches(indexed_images, max_batch_size, max_payload_bytes):
+    """
+    Greedily group (index, image) pairs into batches that respect both the
+    instance count and payload size limits, preserving input order.
+    """
+    batches = []
+    current, current_size = [], 0
+    for index, image in indexed_images:
+        size = _instance_size(image)
+        if current and (len(current) >= max_batch_size or current_size + size > max_payload_bytes):
+            batches.append(current)
+            current, current_size = [], 0
+        current.append((index, image))
+        current_size += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _predict_batch(batch, predictions, failed, priority="bulk", shed=None):
+    """
+    Send one batch and write results into `predictions` by input index.
+    A batch rejected as invalid or too large (HTTP 400/413) is split in half
+    and retried so one bad image only fails the items it actually affects;
+    other errors (outages, timeouts) fail the whole batch without retrying.
+    Indices answered by the fallback backend are added to `shed`.
     """
     try:
-        with open(image_path, "rb") as f:
-            image_bytes = f.read()
+        images = [image for _, image in batch]
+        results, was_shed = _admitted(get_backend(), lambda backend: backend.predict(images), priority)
+        if was_shed and shed is not None:
+            shed.update(index for index, _ in batch)
+        if len(results) != len(batch):
+            raise ValueError(f"expected {len(batch)} predictions, got {len(results)}")
+    except Exception as e:
+        if len(batch) == 1 or getattr(e, "code", None) not in _SPLITTABLE_ERROR_CODES:
+            for index, _ in batch:
+                failed[index] = str(e)
+            return
+        middle = len(batch) // 2
+        _predict_batch(batch[:middle], predictions, failed, priority, shed)
+        _predict_batch(batch[middle:], predictions, failed, priority, shed)
+        return
+
+    for (index, _), result in zip(batch, results):
+        predictions[index] = result
 
-        # Convert image to base64
-        encoded_image = base64.b64encode(image_bytes).decode("utf-8")
 
-        # Prepare payload
-        instance = {"content": encoded_image}
-        instances = [instance]
+def _report_preprocessing(stats):
+    """Log how much preprocessing shrank an upload."""
+    print(
+        f"📉 Image {stats['size_before'][0]}x{stats['size_before'][1]} → "
+        f"{stats['size_after'][0]}x{stats['size_after'][1]}, "
+        f"{stats['bytes_before'] / 1024:.0f} KB → {stats['bytes_after'] / 1024:.0f} KB"
+    )
+
 
-        print("🔍 Sending image for prediction...")
+def predict_images(images, max_batch_size=None, max_payload_bytes=None, use_cache=True, preprocess=True,
+                   priority="bulk"):
+    """
+    Classify many images with as few endpoint round trips as possible.
 
-        # Send request to Vertex AI
-        prediction_response = endpoint.predict(instances=instances)
-        predictions = prediction_response.predictions
+    Args:
+        images (list): Raw image bytes or buffers, one entry per image
+        max_batch_size (int): Max instances per request (default MAX_BATCH_SIZE)
+        max_payload_bytes (int): Max encoded payload per request (default MAX_PAYLOAD_BYTES)
+        use_cache (bool): Serve repeated images from prediction_cache
+        preprocess (bool): Downscale and re-encode images before upload
+        priority (str): Admission priority, "bulk" or "interactive" (a user is waiting)
+
+    Returns:
+        dict: "predictions" holds one result per input image in input order
+        (None for failures) and "failed" maps input index to an error message.
+    """
+    from Backend.Classification_model.preprocessing import preprocess_image
+    from Backend.Classification_model.validation import validate_image_header
+
+    max_batch_size = max_batch_size or MAX_BATCH_SIZE
+    max_payload_bytes = max_payload_bytes or MAX_PAYLOAD_BYTES
+
+    predictions = [None] * len(images)
+    failed = {}
+    backend = get_backend()
+    namespace = _cache_namespace(backend) if use_cache else None
+    variant = _cache_variant(preprocess)
+    prediction_cache = get_prediction_cache()
+
+    indexed_images = []
+    images = [_as_buffer(image) for image in images]
+    for index, image_bytes in enumerate(images):
+        try:
+            validate_image_header(image_bytes)
+        except ValueError as e:
+            failed[index] = f"invalid image: {e}"
+            continue
+        if use_cache:
+            cached = prediction_cache.get(image_bytes, namespace, variant)
+            if cached is not None:
+                predictions[index] = cached
+                continue
+        if preprocess:
+            try:
+                image_bytes, _ = preprocess_image(image_bytes)
+            except Exception as e:
+                failed[index] = f"preprocessing failed: {e}"
+                continue
+        if _instance_size(image_bytes) > max_payload_bytes:
+            failed[index] = f"image exceeds max payload of {max_payload_bytes} bytes"
+            continue
+        indexed_images.append((index, image_bytes))
+
+    batches = _pack_batches(indexed_images, max_batch_size, max_payload_bytes)
+    print(f"🔍 Sending {len(indexed_images)} images in {len(batches)} request(s) to {backend.name}...")
+
+    shed = set()
+    for batch in batches:
+        _predict_batch(batch, predictions, failed, priority, shed)
+
+    if use_cache:
+        for index, _ in indexed_images:
+            if predictions[index] is not None and index not in shed:
+                prediction_cache.put(images[index], namespace, predictions[index], variant)
+
+    if failed:
+        print(f"⚠️ {len(failed)} of {len(images)} images failed.")
+    else:
+        print("✅ Batch prediction successful!")
+    return {"predictions": predictions, "failed": failed}
+
+
+def _as_buffer(image_data):
+    """
+    Return a bytes-like view of an image without copying it where possible.
+    Accepts bytes, bytearray, memoryview or a file-like object such as
+    Streamlit's UploadedFile (a BytesIO subclass).
+    """
+    if isinstance(image_data, (bytes, bytearray, memoryview)):
+        return image_data
+    if hasattr(image_data, "getbuffer"):
+        return image_data.getbuffer()
+    if hasattr(image_data, "read"):
+        return image_data.read()
+    raise TypeError(f"Unsupported image data type: {type(image_data).__name__}")
+
+
+def predict_image_bytes(image_data, use_cache=True, preprocess=True, cascade=None, priority="interactive"):
+    """
+    Classifies in-memory image data with the configured backend (Vertex AI by default).
+    Repeated images are answered from prediction_cache (exact bytes) when
+    use_cache is set, or near_duplicate_index (similar photos) when
+    NEAR_DUPLICATE_LOOKUP is also enabled, and images
+    are downscaled/re-encoded first when preprocess is set.
+
+    Args:
+        image_data: bytes, memoryview or file-like object (e.g. UploadedFile)
+        cascade (bool): Try a thumbnail before full resolution (default PREDICT_CASCADE);
+            requires preprocess
+        priority (str): Admission priority, "interactive" (default) or "bulk"
+
+    Returns:
+        list: Predictions from the endpoint, or None if the request failed
+    """
+    from Backend.Classification_model.cache import PredictionCache
+    from Backend.Classification_model.preprocessing import preprocess_image
+    from Backend.Classification_model.validation import validate_image_header
+
+    try:
+        prediction_cache = get_prediction_cache()
+        image_bytes = _as_buffer(image_data)
+        # Reject corrupt, animated or oversized uploads from the header alone
+        validate_image_header(image_bytes)
+        backend = get_backend()
+        endpoint_name = _cache_namespace(backend)
+        if cascade is None:
+            cascade = USE_CASCADE
+        cascade = cascade and preprocess
+        variant = _cache_variant(preprocess, cascade)
+
+        if use_cache:
+            cached = prediction_cache.get(image_bytes, endpoint_name, variant)
+            if cached is not None:
+                print("⚡ Prediction served from cache.")
+                return [cached]
+
+        fingerprint = None
+        if use_cache and NEAR_DUPLICATE_LOOKUP:
+            near_duplicate_index = get_near_duplicate_index()
+            fingerprint = near_duplicate_index.fingerprint(image_bytes)
+            similar, distance = near_duplicate_index.lookup(fingerprint, endpoint_name)
+            if similar is not None:
+                # Not written to prediction_cache: these exact bytes were never classified
+                print(f"⚡ Near-duplicate photo found ({distance} bits apart), reusing prediction.")
+                return [similar]
+
+        def _fetch():
+            if cascade:
+                print(f"🔍 Sending thumbnail for prediction ({backend.name})...")
+                predictions, shed = _admitted(
+                    backend, lambda target: get_prediction_cascade().predict(target, image_bytes), priority
+                )
+            else:
+                upload_bytes = image_bytes
+                if preprocess:
+                    upload_bytes, stats = preprocess_image(image_bytes)
+                    _report_preprocessing(stats)
+
+                print(f"🔍 Sending image for prediction ({backend.name})...")
+                predictions, shed = _admitted(backend, lambda target: target.predict([upload_bytes]), priority)
+
+            if use_cache and predictions and not shed:
+                prediction_cache.put(image_bytes, endpoint_name, predictions[0], variant)
+                # Only canonical results are offered to other, similar photos
+                if fingerprint is not None and variant is None:
+                    get_near_duplicate_index().add(fingerprint, endpoint_name, predictions[0])
+            return predictions
+
+        # Concurrent requests for the same image share one endpoint call
+        flight_key = PredictionCache.make_key(image_bytes, endpoint_name, variant)
+        predictions = in_flight_predictions.do(flight_key, _fetch)
 
         print("✅ Prediction successful!")
         return predictions
@@ -75,6 +809,65 @@ def predict_image_classification(image_path: str):
         return None
 
 
+def get_speculative_predictor():
+    """Return the shared SpeculativePredictor used by the upload page."""
+    global _speculative_predictor
+
+    with _speculative_lock:
+        if _speculative_predictor is None:
+            # Speculative work yields to users who are actually waiting
+            _speculative_predictor = SpeculativePredictor(
+                lambda image_bytes: predict_image_bytes(image_bytes, priority="bulk")
+            )
+    return _speculative_predictor
+
+
+def _run_prediction_job(image_bytes):
+    """Job handler: raise on failure so the queue retries the job."""
+    from Backend.Classification_model.validation import validate_image_header, ImageValidationError
+
+    # An invalid image fails the same way on every attempt
+    try:
+        validate_image_header(image_bytes)
+    except ImageValidationError as e:
+        raise PermanentJobError(str(e)) from e
+    result = predict_image_bytes(image_bytes)
+    if result is None:
+        raise RuntimeError("Prediction failed or returned empty result.")
+    return result
+
+
+def get_job_queue():
+    """Return the shared JobQueue, starting its workers on first use."""
+    global _job_queue
+
+    with _job_queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue(
+                _run_prediction_job,
+                db_path=JOB_QUEUE_DB,
+                workers=JOB_QUEUE_WORKERS,
+                max_attempts=JOB_MAX_ATTEMPTS,
+                stale_after=JOB_STALE_SECONDS,
+            )
+    return _job_queue
+
+
+def predict_image_classification(image_path: str, use_cache=True, preprocess=True):
+    """
+    Classifies an image file with the configured backend and returns predictions.
+    Thin wrapper around predict_image_bytes.
+    """
+    try:
+        with open(image_path, "rb") as f:
+            image_bytes = f.read()
+    except OSError as e:
+        print(f"❌ Prediction failed: {e}")
+        return None
+
+    return predict_image_bytes(image_bytes, use_cache=use_cache, preprocess=preprocess)
+
+
 # Example test (run directly)
 if __name__ == "__main__":
     test_image = "Backend\Classification_model\pizzaa.jpg"
@@ -0,0 +1,62 @@
+"""
+Image preprocessing before upload to Vertex AI.
+Applies EXIF orientation, strips metadata, downsizes to the model's input
+resolution and re-encodes as JPEG so phone photos shrink from megabytes to
+tens of kilobytes before they are base64-encoded and sent.
+"""
+
+from PIL import Image, ImageOps
+import io
+import os
+
+# Longest side sent to the model and JPEG quality used for re-encoding
+MODEL_INPUT_SIZE = int(os.getenv("MODEL_INPUT_SIZE", "512"))
+JPEG_QUALITY = int(os.getenv("JPEG_QUALITY", "90"))
+
+
+def preprocess_image(image_bytes, max_side=None, quality=None):
+    """
+    Normalize an uploaded image for prediction.
+
+    Args:
+        image_bytes (bytes): Raw image file contents (JPEG or PNG)
+        max_side (int): Longest side in pixels after resizing (default MODEL_INPUT_SIZE)
+        quality (int): JPEG quality 1-95 (default JPEG_QUALITY)
+
+    Returns:
+        tuple: (jpeg_bytes, stats) where stats reports bytes and dimensions
+        before and after preprocessing
+    """
+    max_side = max_side or MODEL_INPUT_SIZE
+    quality = quality or JPEG_QUALITY
+
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        size_before = image.size
+
+        # Rotate pixels to match the EXIF orientation tag
+        image = ImageOps.exif_transpose(image)
+
+        # Flatten transparency onto white; JPEG has no alpha channel
+        if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+        # Downscale only; never upsample small images
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+
+        # Saving without exif/icc_profile arguments drops all metadata
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=quality, optimize=True)
+        processed = output.getvalue()
+
+    stats = {
+        "bytes_before": len(image_bytes),
+        "bytes_after": len(processed),
+        "size_before": size_before,
+        "size_after": image.size,
+    }
+    return processed, stats
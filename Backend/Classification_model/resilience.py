@@ -0,0 +1,158 @@
+"""
+Resilience layer for endpoint calls.
+Wraps a prediction call with an overall deadline, jittered exponential
+backoff for retryable errors only, and a circuit breaker that fails fast
+while the endpoint is unhealthy instead of tying up Streamlit threads.
+"""
+
+import random
+import threading
+import time
+
+# HTTP-style status codes worth retrying (google.api_core exceptions expose .code)
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+# Not worth retrying, but every request will fail the same way (bad credentials
+# or permissions), so they count against the circuit breaker
+BREAKER_FAILURE_STATUS_CODES = (401, 403)
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the endpoint while the circuit breaker is open."""
+
+
+class DeadlineExceededError(Exception):
+    """Raised when a call runs out of time across all of its attempts."""
+
+
+def is_retryable(error):
+    """True for transient errors: throttling, server errors, timeouts and dropped connections."""
+    if isinstance(error, (ConnectionError, TimeoutError, DeadlineExceededError)):
+        return True
+    return getattr(error, "code", None) in RETRYABLE_STATUS_CODES
+
+
+class CircuitBreaker:
+    """
+    Classic closed → open → half-open circuit breaker.
+
+    Args:
+        failure_threshold (int): Consecutive failures that open the circuit
+        reset_timeout (float): Seconds to stay open before allowing a trial call
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """Current state, moving from open to half-open once the timeout has passed."""
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            return self._state
+
+    def allow_request(self):
+        """Whether a call may go to the endpoint right now."""
+        state = self.state
+        with self._lock:
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                # Let exactly one trial call through
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_neutral(self):
+        """A call that says nothing about endpoint health (e.g. a rejected request)."""
+        with self._lock:
+            # Only free the half-open trial slot; state and failure count are unchanged
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def snapshot(self):
+        """State for display on the upload page."""
+        state = self.state
+        with self._lock:
+            retry_in = max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "retry_in_seconds": round(retry_in, 1) if state == self.OPEN else 0.0,
+            }
+
+
+def call_with_resilience(call, breaker, deadline=20.0, max_attempts=3, base_delay=0.5, max_delay=4.0):
+    """
+    Run `call(timeout)` under a deadline with retries and a circuit breaker.
+
+    Args:
+        call (callable): Receives the seconds left for this attempt and performs the request
+        breaker (CircuitBreaker): Shared breaker for the endpoint
+        deadline (float): Total seconds allowed across all attempts and backoff
+        max_attempts (int): Attempts for retryable errors
+        base_delay (float): First backoff ceiling in seconds, doubled per attempt
+        max_delay (float): Upper bound for a single backoff sleep
+
+    Returns:
+        Whatever `call` returns
+    """
+    if not breaker.allow_request():
+        raise CircuitOpenError("Prediction endpoint is unhealthy; failing fast.")
+
+    expires_at = time.monotonic() + deadline
+    for attempt in range(max_attempts):
+        remaining = expires_at - time.monotonic()
+        if remaining <= 0:
+            breaker.record_failure()
+            raise DeadlineExceededError(f"Prediction deadline of {deadline}s exceeded.")
+
+        try:
+            result = call(remaining)
+        except Exception as e:
+            if not is_retryable(e):
+                if getattr(e, "code", None) in BREAKER_FAILURE_STATUS_CODES:
+                    breaker.record_failure()
+                else:
+                    # The request itself was bad; that neither proves nor disproves health
+                    breaker.record_neutral()
+                raise
+            if attempt == max_attempts - 1:
+                breaker.record_failure()
+                raise
+
+            # Full jitter: sleep a random amount up to the exponential ceiling
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            if time.monotonic() + delay >= expires_at:
+                breaker.record_failure()
+                raise DeadlineExceededError(f"Prediction deadline of {deadline}s exceeded.") from e
+            print(f"🔁 Retrying prediction in {delay:.2f}s after: {e}")
+            time.sleep(delay)
+            continue
+
+        breaker.record_success()
+        return result
@@ -0,0 +1,140 @@
+"""
+Latency-aware routing across several prediction endpoints.
+Each endpoint (e.g. the same model deployed in different regions) keeps
+exponentially weighted moving averages of its latency and error rate.
+Requests go to the fastest healthy endpoint and fail over to the next one
+when a call fails with a retryable error.
+"""
+
+import threading
+import time
+
+from Backend.Classification_model.resilience import is_retryable
+
+
+class EndpointStats:
+    """Latency and error EWMAs for one endpoint."""
+
+    def __init__(self, name):
+        self.name = name
+        self.latency_ewma = None
+        self.error_ewma = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.unhealthy_since = None
+
+
+class EndpointRouter:
+    """
+    Drop-in replacement for aiplatform.Endpoint that spreads calls over
+    several endpoints.
+
+    Args:
+        endpoints (list): (name, endpoint) pairs; every endpoint exposes
+            predict(instances, parameters=None, timeout=None)
+        alpha (float): EWMA smoothing factor (weight of the newest sample)
+        max_error_rate (float): Error EWMA above which an endpoint is unhealthy
+        probe_after (float): Seconds before an unhealthy endpoint gets a trial request
+    """
+
+    def __init__(self, endpoints, alpha=0.2, max_error_rate=0.5, probe_after=30.0):
+        self.endpoints = dict(endpoints)
+        self.alpha = alpha
+        self.max_error_rate = max_error_rate
+        self.probe_after = probe_after
+        self._stats = {name: EndpointStats(name) for name in self.endpoints}
+        self._lock = threading.Lock()
+
+    def _score(self, stats):
+        """Expected cost of a request; endpoints never measured are tried first."""
+        if stats.latency_ewma is None:
+            return 0.0
+        # Penalize flaky endpoints: a failure costs roughly another round trip elsewhere
+        return stats.latency_ewma * (1 + stats.error_ewma)
+
+    def _ranked(self):
+        """Endpoint names ordered best first: healthy by score, then unhealthy due a probe."""
+        now = time.monotonic()
+        with self._lock:
+            healthy, probes, rest = [], [], []
+            for stats in self._stats.values():
+                if stats.unhealthy_since is None:
+                    healthy.append(stats)
+                elif now - stats.unhealthy_since >= self.probe_after:
+                    probes.append(stats)
+                else:
+                    rest.append(stats)
+            healthy.sort(key=self._score)
+            probes.sort(key=self._score)
+            rest.sort(key=lambda stats: stats.error_ewma)
+            # Unhealthy endpoints stay as a last resort rather than failing outright
+            return [stats.name for stats in probes[:1] + healthy + probes[1:] + rest]
+
+    def _record(self, name, latency=None, failed=False):
+        with self._lock:
+            stats = self._stats[name]
+            stats.requests += 1
+            stats.error_ewma = (1 - self.alpha) * stats.error_ewma + self.alpha * float(failed)
+            if failed:
+                stats.failures += 1
+                if stats.error_ewma > self.max_error_rate and stats.unhealthy_since is None:
+                    print(f"⚠️ Endpoint {name} marked unhealthy (error rate {stats.error_ewma:.2f}).")
+                    stats.unhealthy_since = time.monotonic()
+                elif stats.unhealthy_since is not None:
+                    # Failed probe: wait another full period
+                    stats.unhealthy_since = time.monotonic()
+            else:
+                if stats.latency_ewma is None:
+                    stats.latency_ewma = latency
+                else:
+                    stats.latency_ewma = (1 - self.alpha) * stats.latency_ewma + self.alpha * latency
+                if stats.error_ewma <= self.max_error_rate:
+                    stats.unhealthy_since = None
+
+    def predict(self, instances, parameters=None, timeout=None):
+        """Send to the best endpoint, failing over on retryable errors within `timeout`."""
+        expires_at = time.monotonic() + timeout if timeout is not None else None
+        last_error = None
+
+        for name in self._ranked():
+            remaining = None
+            if expires_at is not None:
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    break
+
+            start = time.perf_counter()
+            try:
+                response = self.endpoints[name].predict(
+                    instances=instances, parameters=parameters, timeout=remaining
+                )
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                self._record(name, failed=True)
+                print(f"🔀 Endpoint {name} failed ({e}), failing over...")
+                last_error = e
+                continue
+
+            self._record(name, latency=time.perf_counter() - start)
+            return response
+
+        if last_error is not None:
+            raise last_error
+        raise TimeoutError("No endpoint answered before the deadline.")
+
+    def snapshot(self):
+        """Per-endpoint EWMAs and health, best first."""
+        order = self._ranked()
+        with self._lock:
+            return [
+                {
+                    "name": name,
+                    "latency_ms_ewma": (self._stats[name].latency_ewma or 0.0) * 1000,
+                    "error_rate_ewma": self._stats[name].error_ewma,
+                    "requests": self._stats[name].requests,
+                    "failures": self._stats[name].failures,
+                    "healthy": self._stats[name].unhealthy_since is None,
+                }
+                for name in order
+            ]
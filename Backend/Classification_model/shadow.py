@@ -0,0 +1,177 @@
+"""
+Shadow traffic for candidate model endpoints.
+A sampled fraction of live requests is replayed against a second endpoint in
+a background thread, off the user's critical path. Latency of both endpoints
+and top-1 label agreement are written to a local SQLite metrics store.
+
+Summarize the collected metrics with:
+    python -m Backend.Classification_model.shadow --db shadow_metrics.db
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import random
+import sqlite3
+import threading
+import time
+
+from Backend.Classification_model.batcher import percentile
+
+
+def top1_label(prediction):
+    """Most confident label of a Vertex-style prediction, or None."""
+    labels = prediction.get("displayNames") or []
+    scores = prediction.get("confidences") or []
+    if not labels or not scores:
+        return None
+    return labels[scores.index(max(scores))]
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS shadow_results ("
+        " created_at REAL NOT NULL,"
+        " primary_latency_ms REAL,"
+        " candidate_latency_ms REAL,"
+        " primary_label TEXT,"
+        " candidate_label TEXT,"
+        " agree INTEGER,"
+        " error TEXT)"
+    )
+    conn.commit()
+    return conn
+
+
+class ShadowTraffic:
+    """
+    Mirrors sampled requests to a candidate endpoint.
+
+    Args:
+        endpoint_factory (callable): Returns the candidate endpoint (built lazily
+            in the background); it must expose predict(instances, parameters, timeout)
+        sample_rate (float): Fraction of requests mirrored (0-1)
+        db_path (str): SQLite file for the metrics store
+        max_pending (int): Shadow requests allowed in flight; extra samples are dropped
+        timeout (float): Seconds allowed for each shadow call
+    """
+
+    def __init__(self, endpoint_factory, sample_rate=0.05, db_path="shadow_metrics.db",
+                 max_pending=4, timeout=30.0):
+        self.endpoint_factory = endpoint_factory
+        self.sample_rate = sample_rate
+        self.timeout = timeout
+        self._endpoint = None
+        self._endpoint_lock = threading.Lock()
+        self._conn = _connect(db_path)
+        self._db_lock = threading.Lock()
+        # Separate from _db_lock so callers never wait behind a SQLite commit
+        self._stats_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=max_pending, thread_name_prefix="shadow")
+
+        self.dropped = 0
+
+    def maybe_shadow(self, instances, parameters, primary_predictions, primary_latency):
+        """
+        Sample this request and, if selected, replay it in the background.
+        Never blocks and never raises into the caller.
+        """
+        if random.random() >= self.sample_rate:
+            return
+        if not self._slots.acquire(blocking=False):
+            # Called from many request threads; the lock keeps the count exact
+            with self._stats_lock:
+                self.dropped += 1
+            return
+        self._executor.submit(self._replay, instances, parameters, primary_predictions, primary_latency)
+
+    def _replay(self, instances, parameters, primary_predictions, primary_latency):
+        try:
+            if self._endpoint is None:
+                # Several shadow workers can start at once; build the endpoint only once
+                with self._endpoint_lock:
+                    if self._endpoint is None:
+                        self._endpoint = self.endpoint_factory()
+
+            start = time.perf_counter()
+            error, candidate_predictions = None, []
+            try:
+                candidate_predictions = self._endpoint.predict(
+                    instances=instances, parameters=parameters, timeout=self.timeout
+                ).predictions
+            except Exception as e:
+                error = str(e)[:200]
+            candidate_latency = time.perf_counter() - start
+
+            rows = []
+            for i, primary in enumerate(primary_predictions):
+                primary_label = top1_label(primary)
+                candidate_label = top1_label(candidate_predictions[i]) if i < len(candidate_predictions) else None
+                rows.append((
+                    time.time(),
+                    primary_latency * 1000,
+                    None if error else candidate_latency * 1000,
+                    primary_label,
+                    candidate_label,
+                    None if error else int(primary_label == candidate_label),
+                    error,
+                ))
+            with self._db_lock:
+                self._conn.executemany("INSERT INTO shadow_results VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                self._conn.commit()
+        except Exception as e:
+            print(f"⚠️ Shadow request failed: {e}")
+        finally:
+            self._slots.release()
+
+
+def summarize(db_path):
+    """
+    Aggregate shadow metrics.
+
+    Returns:
+        dict: sample count, agreement rate, error rate and latency percentiles
+    """
+    conn = _connect(db_path)
+    rows = conn.execute(
+        "SELECT primary_latency_ms, candidate_latency_ms, agree, error FROM shadow_results"
+    ).fetchall()
+    conn.close()
+
+    ok = [row for row in rows if row[3] is None]
+    primary = [row[0] for row in ok]
+    candidate = [row[1] for row in ok]
+    deltas = [c - p for p, c in zip(primary, candidate)]
+    return {
+        "samples": len(rows),
+        "errors": len(rows) - len(ok),
+        "agreement": sum(row[2] for row in ok) / len(ok) if ok else 0.0,
+        "primary_ms_p50": percentile(primary, 50),
+        "primary_ms_p95": percentile(primary, 95),
+        "candidate_ms_p50": percentile(candidate, 50),
+        "candidate_ms_p95": percentile(candidate, 95),
+        "delta_ms_p50": percentile(deltas, 50),
+        "delta_ms_p95": percentile(deltas, 95),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize shadow traffic metrics.")
+    parser.add_argument("--db", default="shadow_metrics.db", help="Shadow metrics SQLite file")
+    args = parser.parse_args()
+
+    summary = summarize(args.db)
+    if not summary["samples"]:
+        print("No shadow samples recorded yet.")
+        return
+
+    print(f"Samples:          {summary['samples']} ({summary['errors']} candidate errors)")
+    print(f"Top-1 agreement:  {summary['agreement'] * 100:.1f}%")
+    print(f"Primary p50/p95:  {summary['primary_ms_p50']:.0f} / {summary['primary_ms_p95']:.0f} ms")
+    print(f"Candidate p50/p95: {summary['candidate_ms_p50']:.0f} / {summary['candidate_ms_p95']:.0f} ms")
+    print(f"Delta p50/p95:    {summary['delta_ms_p50']:+.0f} / {summary['delta_ms_p95']:+.0f} ms (candidate - primary)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+Single-flight request coalescing.
+When several sessions ask for the same key at the same time, only the first
+caller runs the work; the others wait on the same future and share its
+result (or its exception).
+"""
+
+from concurrent.futures import Future
+import threading
+
+
+class SingleFlight:
+    """Process-wide de-duplication of identical in-flight calls."""
+
+    def __init__(self):
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+        self.leaders = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        """
+        Run fn() once per key among concurrent callers.
+
+        Args:
+            key (str): Identity of the work (e.g. image hash + endpoint)
+            fn (callable): Work to run if no identical call is in flight
+
+        Returns:
+            The result of fn(), possibly computed by another thread
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self.leaders += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def stats(self):
+        """How many calls did the work vs. piggybacked on another caller."""
+        with self._lock:
+            return {"leaders": self.leaders, "shared": self.shared, "in_flight": len(self._in_flight)}
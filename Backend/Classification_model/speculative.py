@@ -0,0 +1,94 @@
+"""
+Speculative prediction for freshly uploaded photos.
+The upload page starts the prediction in a background worker as soon as a
+file arrives, so by the time the user clicks "Analyze Food" the result is
+usually ready. Results that are never claimed (the user removed or replaced
+the photo, or left) are discarded.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import threading
+import time
+
+
+class SpeculativePredictor:
+    """
+    Background prediction jobs keyed by (session, image hash).
+
+    Args:
+        predict_fn (callable): Takes image bytes, returns predictions
+        max_workers (int): Concurrent speculative predictions
+        max_entries (int): Max unclaimed jobs kept; oldest are discarded first
+        ttl (float): Seconds an unclaimed job is kept before being discarded
+    """
+
+    def __init__(self, predict_fn, max_workers=4, max_entries=64, ttl=300.0):
+        self.predict_fn = predict_fn
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.started = 0
+        self.claimed = 0
+        self.discarded = 0
+
+    def _prune(self):
+        """Drop expired or excess unclaimed jobs (caller holds the lock)."""
+        now = time.monotonic()
+        while self._jobs:
+            key, (future, started_at) = next(iter(self._jobs.items()))
+            if len(self._jobs) <= self.max_entries and now - started_at < self.ttl:
+                break
+            future.cancel()
+            del self._jobs[key]
+            self.discarded += 1
+
+    def start(self, key, image_bytes):
+        """
+        Begin predicting in the background unless a job for this key exists.
+
+        Returns:
+            concurrent.futures.Future: resolves to the predictions
+        """
+        with self._lock:
+            self._prune()
+            if key in self._jobs:
+                return self._jobs[key][0]
+            future = self._executor.submit(self.predict_fn, image_bytes)
+            self._jobs[key] = (future, time.monotonic())
+            self.started += 1
+            return future
+
+    def claim(self, key):
+        """
+        Hand over a job's future to the caller and stop tracking it.
+
+        Returns:
+            concurrent.futures.Future or None if no job exists for the key
+        """
+        with self._lock:
+            job = self._jobs.pop(key, None)
+            if job is None:
+                return None
+            self.claimed += 1
+            return job[0]
+
+    def discard(self, key):
+        """Forget an abandoned job; a queued job is cancelled, a running one's result is dropped."""
+        with self._lock:
+            job = self._jobs.pop(key, None)
+            if job is not None:
+                job[0].cancel()
+                self.discarded += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "started": self.started,
+                "claimed": self.claimed,
+                "discarded": self.discarded,
+                "pending": len(self._jobs),
+            }
@@ -0,0 +1,122 @@
+"""
+Early validation of uploaded images.
+Only the image header is parsed (PIL opens files lazily and does not decode
+pixels until asked), so corrupt, animated, truncated or absurdly large
+uploads are rejected before any decode, preprocessing or network work.
+"""
+
+from PIL import Image, UnidentifiedImageError
+import io
+import os
+import warnings
+
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", "50000000"))
+MIN_IMAGE_SIDE = int(os.getenv("MIN_IMAGE_SIDE", "32"))
+
+# Phone cameras save JPEGs with an embedded preview as MPO; the first frame is the photo
+ALLOWED_FORMATS = ("JPEG", "MPO", "PNG")
+
+# A complete JPEG ends with an EOI marker and a complete PNG with an IEND chunk,
+# either possibly followed by a vendor trailer of any length (motion photos
+# append a whole video), so both are searched for backwards from the end of
+# the file, one window at a time
+_JPEG_EOI = b"\xff\xd9"
+_PNG_IEND = b"IEND"
+_TRAILER_WINDOW = 64 * 1024
+
+
+def _contains_marker(image_bytes, marker):
+    """
+    Whether `marker` occurs in the file, searched backwards in windows so the
+    common case (no or a short trailer) only copies the last window.
+    """
+    view = memoryview(image_bytes)
+    end = len(view)
+    while end > 0:
+        start = max(0, end - _TRAILER_WINDOW)
+        # Overlap the next window so a marker split across the boundary is found
+        if marker in view[start:min(end + len(marker) - 1, len(view))].tobytes():
+            return True
+        end = start
+    return False
+
+
+class ImageValidationError(ValueError):
+    """Raised for uploads that should not be processed; the message is user-facing."""
+
+
+def validate_image_header(image_bytes, max_bytes=None, max_pixels=None, min_side=None):
+    """
+    Check an upload using only its size and header.
+
+    Args:
+        image_bytes (bytes): Raw image file contents (bytes or memoryview)
+        max_bytes (int): Largest accepted file (default MAX_UPLOAD_BYTES)
+        max_pixels (int): Largest accepted width x height (default MAX_IMAGE_PIXELS)
+        min_side (int): Smallest accepted width or height (default MIN_IMAGE_SIDE)
+
+    Returns:
+        dict: "format", "width", "height", "frames" and "bytes" of a valid image
+
+    Raises:
+        ImageValidationError: If the image is corrupt, truncated, animated,
+            of an unsupported format, or too large or too small
+    """
+    max_bytes = max_bytes or MAX_UPLOAD_BYTES
+    max_pixels = max_pixels or MAX_IMAGE_PIXELS
+    min_side = min_side or MIN_IMAGE_SIDE
+
+    size = len(image_bytes)
+    if size == 0:
+        raise ImageValidationError("The file is empty.")
+    if size > max_bytes:
+        raise ImageValidationError(f"The file is too large ({size / 1e6:.1f} MB, max {max_bytes / 1e6:.0f} MB).")
+
+    try:
+        with warnings.catch_warnings():
+            # PIL warns (rather than raises) between 1x and 2x its own pixel limit
+            warnings.simplefilter("error", Image.DecompressionBombWarning)
+            with Image.open(io.BytesIO(image_bytes)) as image:
+                image_format = image.format
+                width, height = image.size
+                frames = getattr(image, "n_frames", 1)
+                animated = getattr(image, "is_animated", False) and image_format != "MPO"
+    except (UnidentifiedImageError, Image.DecompressionBombError, Image.DecompressionBombWarning):
+        raise ImageValidationError("The file is not a readable image.")
+    except Exception as e:
+        raise ImageValidationError(f"The image header is corrupt ({e}).")
+
+    if image_format not in ALLOWED_FORMATS:
+        raise ImageValidationError(f"{image_format} images are not supported; please upload a JPG or PNG.")
+    if animated:
+        raise ImageValidationError("Animated images are not supported; please upload a single photo.")
+    if width * height > max_pixels:
+        raise ImageValidationError(f"The image is too large ({width}x{height} pixels).")
+    if min(width, height) < min_side:
+        raise ImageValidationError(f"The image is too small ({width}x{height} pixels).")
+
+    # Cheap truncation checks for the end marker, still without decoding
+    if image_format == "PNG" and not _contains_marker(image_bytes, _PNG_IEND):
+        raise ImageValidationError("The image is incomplete (the upload was cut off).")
+    if image_format in ("JPEG", "MPO") and not _contains_marker(image_bytes, _JPEG_EOI):
+        raise ImageValidationError("The image is incomplete (the upload was cut off).")
+
+    return {"format": image_format, "width": width, "height": height, "frames": frames, "bytes": size}
+
+
+# Example checks (run directly)
+if __name__ == "__main__":
+    with open(os.path.join(os.path.dirname(__file__), "pizzaa.jpg"), "rb") as f:
+        photo = f.read()
+    checks = {
+        "photo": photo,
+        # Motion photos append the video clip after the JPEG's EOI marker
+        "motion photo (1 MB trailer)": photo + os.urandom(1024 * 1024).replace(_JPEG_EOI, b"\x00\x00"),
+        "truncated photo": photo[:len(photo) // 2],
+    }
+    for name, image_bytes in checks.items():
+        try:
+            print(f"✅ {name}: {validate_image_header(image_bytes)}")
+        except ImageValidationError as e:
+            print(f"❌ {name}: {e}")
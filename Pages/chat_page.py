@@ -31,11 +31,11 @@ def show_chat_page(user):
         st.markdown(f"**🍱 Last analyzed meal:** {food}  "
                     f"{f'· {conf:.2f}% confidence' if conf is not None else ''}")
 
-        # (Optional) show only top-5 alternatives in an expander
-        top5 = pred.get("top5")
-        if top5:
-            with st.expander("See top-5 alternatives"):
-                for name, score in top5:
+        # (Optional) show the top-k alternatives in an expander
+        top_k = pred.get("top_k")
+        if top_k:
+            with st.expander(f"See top-{len(top_k)} alternatives"):
+                for name, score in top_k:
                     st.write(f"- {name} — {score*100:.1f}%")
 
     # Intro
@@ -5,31 +5,286 @@ Send uploaded image to Vertex AI endpoint and display prediction.
 """
 
 import streamlit as st
-import tempfile
 import json
-from Backend.Classification_model.predictor import predict_image_classification
+import hashlib
+import uuid
+from Backend.Classification_model.predictor import (
+    predict_image_bytes,
+    get_prediction_health,
+    get_speculative_predictor,
+    get_job_queue,
+    SPECULATIVE_PREDICTION,
+    USE_JOB_QUEUE,
+)
+from Backend.Classification_model.multidish import detect_dishes
+from Backend.Classification_model.burst import predict_video, predict_burst, VideoDecodeError
+from Backend.Classification_model.nutrition import lookup_nutrition, NutrientMatrix
+from Backend.Classification_model.validation import validate_image_header, ImageValidationError
 import pandas as pd
 import matplotlib.pyplot as plt
 
+# Seconds between status checks while a queued prediction job is still pending
+JOB_POLL_SECONDS = 1.0
+
+
+def show_degraded_mode_notice():
+    """Warn the user when the prediction endpoint's circuit breaker is open."""
+    health = get_prediction_health()
+    if health["state"] == "open":
+        st.warning(
+            "⚠️ Our food recognition service is having trouble right now. "
+            f"Please try again in about {int(health['retry_in_seconds']) + 1} seconds."
+        )
+        return True
+    return False
+
+
+def start_speculative_prediction(uploaded_file):
+    """
+    Start predicting a new upload in the background and discard the job for
+    a photo the user removed or replaced.
+
+    Returns:
+        str: Key of the current upload's job, or None when nothing is uploaded
+    """
+    speculative = get_speculative_predictor()
+    if "speculative_session" not in st.session_state:
+        st.session_state["speculative_session"] = uuid.uuid4().hex
+
+    key = None
+    if uploaded_file is not None:
+        digest = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+        key = f"{st.session_state['speculative_session']}:{digest}"
+
+    previous = st.session_state.get("speculative_key")
+    if previous and previous != key:
+        speculative.discard(previous)
+    if key and key != previous:
+        # Copy the bytes: the upload buffer may be released before the worker runs
+        speculative.start(key, uploaded_file.getvalue())
+
+    st.session_state["speculative_key"] = key
+    return key
+
+
+def clear_stale_job(uploaded_file):
+    """Forget the pending job when its photo was removed or replaced."""
+    pending_job = st.session_state.get("pending_job")
+    if not pending_job:
+        return
+    if uploaded_file is None or hashlib.sha256(uploaded_file.getbuffer()).hexdigest() != pending_job["digest"]:
+        st.session_state.pop("pending_job", None)
+
+
+def run_queued_prediction(uploaded_file, wait_seconds=0.2):
+    """
+    Enqueue the upload as a background job (once) and check on it without
+    holding up the script; show_pending_job polls it while it is pending.
+    The job id is kept in session state, so a rerun picks up the same job.
+
+    Returns:
+        tuple: (result or None, pending) where pending means the job is still queued or running
+    """
+    queue = get_job_queue()
+    digest = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+    pending_job = st.session_state.get("pending_job")
+    if not pending_job or pending_job["digest"] != digest:
+        pending_job = {"digest": digest, "job_id": queue.enqueue(uploaded_file.getvalue())}
+        st.session_state["pending_job"] = pending_job
+
+    job = queue.wait(pending_job["job_id"], timeout=wait_seconds)
+    if job is not None and job["status"] in ("queued", "running"):
+        return None, True
+
+    st.session_state.pop("pending_job", None)
+    return (job["result"] if job else None), False
+
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_pending_job():
+    """
+    Show the queued job's status, refreshing only this fragment every
+    JOB_POLL_SECONDS; the whole page reruns once to display the finished job.
+    """
+    pending_job = st.session_state.get("pending_job")
+    if not pending_job:
+        return
+    job = get_job_queue().get(pending_job["job_id"])
+    if job is None or job["status"] not in ("queued", "running"):
+        st.rerun()
+    st.info("⏳ Your photo is queued for analysis. This can take a moment when many people are analyzing meals.")
+
+
+def get_nutrient_matrix(df_nutrients):
+    """Build the nutrient matrix once per session and database."""
+    matrix = st.session_state.get("nutrient_matrix")
+    if matrix is None or matrix.df_nutrients is not df_nutrients:
+        matrix = NutrientMatrix(df_nutrients)
+        st.session_state["nutrient_matrix"] = matrix
+    return matrix
+
+
+def show_expected_nutrition(prediction):
+    """Show calories weighted over every likely food, not just the top one."""
+    df_nutrients = st.session_state.get("nutrient_database", pd.DataFrame())
+    if df_nutrients.empty or len(prediction.get("displayNames") or []) < 2:
+        return
+    expected = get_nutrient_matrix(df_nutrients).expected(prediction)
+    if expected is None:
+        return
+
+    st.session_state["last_prediction"]["expected_nutrition"] = expected
+    st.info(
+        f"⚖️ Weighing in the other likely foods: about **{expected['expected']['Calories']:.0f} kcal** "
+        f"(likely {expected['low']['Calories']:.0f}–{expected['high']['Calories']:.0f} kcal), "
+        f"{expected['expected']['Protein']:.0f}g protein, {expected['expected']['Fat']:.0f}g fat, "
+        f"{expected['expected']['Carbs']:.0f}g carbs."
+    )
+    st.caption(
+        f"Based on the top {len(prediction['displayNames'])} predicted foods, which hold "
+        f"{expected['coverage'] * 100:.0f}% of the model's confidence; foods outside them are not counted."
+    )
+
+
+def show_multi_dish_results(image_bytes):
+    """Classify crops of the photo and list every food found with total nutrition."""
+    df_nutrients = st.session_state.get("nutrient_database", pd.DataFrame())
+    with st.spinner("Looking for other foods on the plate..."):
+        dishes = detect_dishes(image_bytes, df_nutrients)
+
+    st.markdown("### 🍱 Foods on Your Plate")
+    if not dishes["foods"]:
+        st.info("No other foods recognized with enough confidence.")
+        return
+
+    rows = []
+    for food in dishes["foods"]:
+        nutrition = food["nutrition"] or {}
+        rows.append({
+            "Food": food["label"].replace("_", " ").title(),
+            "Confidence": f"{food['confidence'] * 100:.1f}%",
+            "Portion Size": nutrition.get("Portion Size", "-"),
+            "Calories": nutrition.get("Calories", "-"),
+            "Protein": nutrition.get("Protein", "-"),
+            "Fat": nutrition.get("Fat", "-"),
+            "Carbs": nutrition.get("Carbs", "-"),
+        })
+    st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+    total = dishes["total_nutrition"]
+    col_cal, col_protein, col_fat, col_carbs = st.columns(4)
+    col_cal.metric("🔥 Total Calories", f"{total['Calories']:.0f} kcal")
+    col_protein.metric("🥩 Protein", f"{total['Protein']:.0f}g")
+    col_fat.metric("🧈 Fat", f"{total['Fat']:.0f}g")
+    col_carbs.metric("🍞 Carbs", f"{total['Carbs']:.0f}g")
+    st.caption(f"Checked {dishes['crops']} regions in {dishes['latency_ms']['total_ms']:.0f} ms")
+
+    st.session_state["last_prediction"] = st.session_state.get("last_prediction") or {}
+    st.session_state["last_prediction"]["dishes"] = [
+        {"food_name": food["label"], "confidence": food["confidence"]} for food in dishes["foods"]
+    ]
+
+
+def show_burst_section():
+    """Classify a short video or a burst of photos panned over the table."""
+    st.markdown("### 🎥 Or Pan Over Your Table")
+    uploads = st.file_uploader(
+        "Upload a short video or several photos of the same meal",
+        type=["mp4", "mov", "webm", "jpg", "jpeg", "png"],
+        accept_multiple_files=True,
+        key="burst_uploader",
+    )
+    if not uploads or not st.button("🎞️ Analyze Video / Burst"):
+        return
+
+    videos = [upload for upload in uploads if upload.type.startswith("video/")]
+    try:
+        with st.spinner("Sampling frames and classifying..."):
+            if videos:
+                # The upload is passed as a file object so frames are decoded as a stream
+                result = predict_video(videos[0])
+            else:
+                result = predict_burst([upload.getvalue() for upload in uploads])
+    except (VideoDecodeError, RuntimeError) as e:
+        # Corrupt/unsupported clips, or no video decoder installed
+        st.error(f"❌ {e}")
+        return
+
+    prediction = result["prediction"]
+    if prediction is None:
+        st.error("❌ None of the frames could be classified.")
+        return
+
+    food_name = prediction["displayNames"][0].replace("_", " ").title()
+    confidence = round(prediction["confidences"][0] * 100, 2)
+    st.success(f"✅ Prediction: **{food_name}** ({confidence}% averaged over {result['frames_classified']} frames)")
+    st.caption(
+        f"{result['frames_read']} frames sampled, {result['frames_dropped']} near-duplicates skipped, "
+        f"{result['latency_ms']:.0f} ms"
+    )
+
+    st.session_state["last_prediction"] = {
+        "food_name": food_name,
+        "confidence": confidence,
+        "top_k": list(zip(prediction["displayNames"], prediction["confidences"])),
+    }
+    st.session_state.pop("ella_chat", None)
+
+    food_info = lookup_nutrition(st.session_state.get("nutrient_database", pd.DataFrame()), food_name)
+    if food_info:
+        st.session_state["last_prediction"]["nutrition"] = food_info
+        col_cal, col_protein, col_fat, col_carbs = st.columns(4)
+        col_cal.metric("🔥 Calories", f"{food_info['Calories']} kcal")
+        col_protein.metric("🥩 Protein", f"{food_info['Protein']}g")
+        col_fat.metric("🧈 Fat", f"{food_info['Fat']}g")
+        col_carbs.metric("🍞 Carbs", f"{food_info['Carbs']}g")
+    else:
+        st.warning("⚠️ No nutritional data found for this food item.")
+
+
 def show_upload_analyze_page(user):
     st.title("🍽️ Upload & Analyze Your Food")
 
     # Image upload widget
     uploaded_file = st.file_uploader("📸 Upload an image of your food", type=["jpg", "jpeg", "png"])
 
+    # Check the header before previewing, predicting or uploading anything
+    if uploaded_file is not None:
+        try:
+            validate_image_header(uploaded_file.getbuffer())
+        except ImageValidationError as e:
+            st.error(f"❌ {e}")
+            uploaded_file = None
+
+    # A job queued for a photo that is gone must not be picked up by the next one
+    clear_stale_job(uploaded_file)
+
+    # Speculative mode: start the prediction before the user clicks Analyze
+    speculative_key = start_speculative_prediction(uploaded_file) if SPECULATIVE_PREDICTION else None
+
     if uploaded_file is not None:
         # Show preview
         st.image(uploaded_file, caption="Your uploaded image", use_container_width=True)
 
-        if st.button("🔍 Analyze Food"):
-        
-            # Save temporarily
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_file:
-                temp_file.write(uploaded_file.read())
-                temp_path = temp_file.name
+        degraded = show_degraded_mode_notice()
+
+        multi_dish = st.checkbox("🍱 Detect multiple dishes on the plate")
 
+        # A queued job from an earlier click keeps being polled on reruns
+        if st.button("🔍 Analyze Food") or st.session_state.get("pending_job"):
+
+            # Use the speculative result if one is ready or in flight, then the
+            # job queue if enabled, otherwise predict straight from the upload
+            # buffer (no temp file, no copy)
+            pending = False
             with st.spinner("Sending image to AI model..."):
-                result = predict_image_classification(temp_path)
+                future = get_speculative_predictor().claim(speculative_key) if speculative_key else None
+                if future is not None:
+                    result = future.result()
+                elif USE_JOB_QUEUE:
+                    result, pending = run_queued_prediction(uploaded_file)
+                else:
+                    result = predict_image_bytes(uploaded_file.getbuffer())
 
             # Display results
             if result and isinstance(result, list) and len(result) > 0:
@@ -45,11 +300,11 @@ def show_upload_analyze_page(user):
                     st.success(f"✅ Prediction: **{food_name}**")
 
                     # Save to session_state so that chatbot or dashboard can access
+                    # (only the compact top-k list the predictor returned)
                     st.session_state["last_prediction"] = {
                         "food_name": food_name,
                         "confidence": confidence,
-                        "all_labels": labels,
-                        "all_scores": scores
+                        "top_k": list(zip(labels, scores)),
                     }
 
                     # Reset Ella's chat so new meal context is included next time
@@ -75,6 +330,8 @@ def show_upload_analyze_page(user):
                     </div>
                     """, unsafe_allow_html=True)
 
+                    show_expected_nutrition(preds)
+
                     # --- 🔍 Fetch nutritional data from cached database ---
                     df_nutrients = st.session_state.get("nutrient_database", pd.DataFrame())
                     if not df_nutrients.empty:
@@ -261,5 +518,12 @@ def show_upload_analyze_page(user):
 
                 else:
                     st.warning("No predictions returned.")
-            else:
+            elif pending:
+                show_pending_job()
+            elif not (degraded or show_degraded_mode_notice()):
                 st.error("❌ Prediction failed or returned empty result.")
+
+            if multi_dish and not (degraded or pending):
+                show_multi_dish_results(uploaded_file.getvalue())
+
+    show_burst_section()
@@ -17,6 +17,7 @@ from Pages import home_page, upload_analyze_page, chat_page, profile_page, dashb
 from Backend.Chatbot.chatbot import chatbot_ui  # Import chatbot UI
 from Backend.Users_profile.save_profile import save_user_profile, load_user_profile
 from Backend.Users_profile.save_preferences import save_user_preferences, load_user_preferences
+from Backend.Classification_model.predictor import warm_up_endpoint
 
 from dotenv import load_dotenv
 
@@ -43,6 +44,11 @@ def load_user_data(email):
         st.warning(f"⚠️ Could not load user data: {e}")
         return None, None
 
+# Build the Vertex AI endpoint in the background once per process (opt-in)
+@st.cache_resource
+def start_vertex_warmup():
+    return warm_up_endpoint()
+
 load_dotenv()
 # Automatically choose redirect URI based on environment
 if os.getenv("LOCAL_DEV", "false").lower() == "true":
@@ -56,6 +62,9 @@ def main():
     init_session_state()
     apply_custom_styles()
 
+    if os.getenv("VERTEX_WARMUP", "false").lower() == "true":
+        start_vertex_warmup()
+
     # Handle cached token and user session
     if os.path.exists("token_cache.json"):
         try: